@@ -0,0 +1,194 @@
+'''
+	Measures looking up, toggling and moving source breakpoints when there are thousands of them spread across many files
+
+	Every operation is measured against dap.SourceBreakpoints and against Scan, which finds breakpoints by scanning every breakpoint the way SourceBreakpoints did before it indexed them by file and line.
+	Rendering a file full of breakpoints and log points into the gutter of a headless view is measured separately, including the number of add_regions calls.
+
+		python -m benchmarks.breakpoints
+		python -m benchmarks.breakpoints --breakpoints 50000 --files 5000
+'''
+from __future__ import annotations
+from typing import Any, Callable
+
+import argparse
+import random
+import time
+
+from .headless import View, dap, load, main_thread, report, shutdown
+
+ui = load('ui')
+api = load('dap.api')
+
+
+class Scan(dap.SourceBreakpoints):
+	def __init__(self):
+		super().__init__()
+		self.list: list[dap.SourceBreakpoint] = []
+
+	def __iter__(self):
+		return iter(self.list)
+
+	@property
+	def breakpoints(self) -> list[dap.SourceBreakpoint]:
+		return self.list
+
+	def load_json(self, json: list[Any]):
+		self.list = list(map(lambda j: dap.SourceBreakpoint.from_json(self, j), json))
+		self.list.sort()
+		self.add_breakpoints_to_current_view()
+
+	def remove(self, breakpoint: dap.SourceBreakpoint):
+		self.list.remove(breakpoint)
+		self.updated(breakpoint)
+
+	def reindex(self, breakpoint: dap.SourceBreakpoint): ...
+
+	def breakpoints_for_file(self, file: str) -> list[dap.SourceBreakpoint]:
+		return list(filter(lambda b: b.file == file, self.breakpoints))
+
+	def breakpoints_per_file(self) -> dict[str, list[dap.SourceBreakpoint]]:
+		bps: dict[str, list[dap.SourceBreakpoint]] = {}
+		for breakpoint in self.breakpoints:
+			bps.setdefault(breakpoint.file, []).append(breakpoint)
+		return bps
+
+	def get_breakpoint(self, file: str, line: int, column: int | None = None):
+		for b in self.breakpoints:
+			if b.file == file and b.line == line and b.column == column:
+				return b
+		return None
+
+	def get_breakpoints_on_line(self, file: str, line: int) -> list[dap.SourceBreakpoint]:
+		return list(filter(lambda b: b.file == file and b.line == line, self.breakpoints))
+
+	def add_breakpoint(self, file: str, line: int, column: int | None = None):
+		for breakpoint in self.breakpoints:
+			if breakpoint.file == file and breakpoint.dap.line == line and breakpoint.dap.column == column:
+				return
+
+		breakpoint = dap.SourceBreakpoint(self, file, line, column, True)
+		self.list.append(breakpoint)
+		self.list.sort()
+		self.updated(breakpoint)
+		self.add_breakpoints_to_current_view()
+		return breakpoint
+
+
+def path(file: int):
+	return f'/src/project/file_{file}.py'
+
+
+def locations(breakpoints: int, files: int) -> list[tuple[str, int]]:
+	generator = random.Random(0)
+	per_file = max(breakpoints // files, 1)
+	lines = [sorted(generator.sample(range(1, 5000), per_file)) for _ in range(files)]
+	locations = [(path(file), line) for file in range(files) for line in lines[file]]
+	generator.shuffle(locations)
+	return locations[:breakpoints]
+
+
+def json(locations: list[tuple[str, int]]) -> list[Any]:
+	return [{'file': file, 'line': line, 'column': None, 'enabled': True, 'condition': None, 'logMessage': None, 'hitCondition': None} for file, line in locations]
+
+
+def timed(operation: Callable[[], Any]) -> float:
+	start = time.perf_counter()
+	operation()
+	return round((time.perf_counter() - start) * 1000, 2)
+
+
+def measure(kind: type[dap.SourceBreakpoints], breakpoints: int, files: int, operations: int):
+	everywhere = locations(breakpoints, files)
+	sample = random.Random(1).sample(everywhere, min(operations, len(everywhere)))
+	results: dict[str, Any] = {'implementation': kind.__name__, 'breakpoints': breakpoints, 'files': files, 'operations': len(sample)}
+
+	source = kind()
+	results['load_json_ms'] = timed(lambda: source.load_json(json(everywhere)))
+
+	# toggling twice removes the breakpoint and adds it back
+	results['toggle_ms'] = timed(lambda: [source.toggle(file, line) for file, line in sample for _ in range(2)])
+	results['get_breakpoint_ms'] = timed(lambda: [source.get_breakpoint(file, line) for file, line in sample])
+	results['get_breakpoints_on_line_ms'] = timed(lambda: [source.get_breakpoints_on_line(file, line) for file, line in sample])
+	results['breakpoints_for_file_ms'] = timed(lambda: [source.breakpoints_for_file(file) for file, _ in sample])
+	results['breakpoints_per_file_ms'] = timed(source.breakpoints_per_file)
+
+	# the adapter verifies every breakpoint one line further down
+	def verify():
+		for file, line in sample:
+			if breakpoint := source.get_breakpoint(file, line):
+				source.set_breakpoint_result(breakpoint, None, api.Breakpoint(verified=True, line=line + 1))  # type: ignore
+
+	results['verify_moved_ms'] = timed(verify)
+	return results
+
+
+def gutter(breakpoints: int):
+	source = dap.SourceBreakpoints()
+	view = View('gutter', path(0))
+
+	# every third breakpoint is a log point and every fifth one has a column
+	json = [{'file': path(0), 'line': line * 2, 'column': 4 if line % 5 == 0 else None, 'enabled': True, 'condition': None, 'logMessage': 'log' if line % 3 == 0 else None, 'hitCondition': None} for line in range(1, breakpoints + 1)]
+	source.load_json(json)
+
+	results: dict[str, Any] = {'breakpoints': breakpoints}
+
+	def phase(name: str, operation: Callable[[], Any]):
+		add_regions_count = view.add_regions_count
+
+		def render():
+			operation()
+			main_thread.run_until(lambda: not source.views[view.id()].render_scheduled)
+
+		results[name] = {'ms': timed(render), 'add_regions': view.add_regions_count - add_regions_count}
+
+	phase('render', lambda: source.sync_from_breakpoints(view))
+
+	# the adapter verifies every breakpoint but half of them at a different line
+	def verify():
+		for breakpoint in source.breakpoints:
+			line = breakpoint.line + 1 if breakpoint.line % 4 == 0 else breakpoint.line
+			source.set_breakpoint_result(breakpoint, None, api.Breakpoint(verified=True, line=line))  # type: ignore
+
+	phase('verify', verify)
+	phase('toggle_one', lambda: source.toggle_enabled(source.breakpoints[breakpoints // 2]))
+
+	# an edit at the top of the file moves every breakpoint down
+	lines = {breakpoint: breakpoint.dap.line for breakpoint in source}
+
+	def edit():
+		view.insert_lines(0, 10)
+		source.sync_from_view(view)
+
+	phase('edit', edit)
+	results['edit']['moved'] = sum(1 for breakpoint, line in lines.items() if breakpoint.dap.line == line + 10)
+
+	source.dispose()
+	return results
+
+
+def main():
+	# the headless main loop is already running so shutdown must run even when argparse exits for --help
+	results = []
+	try:
+		parser = argparse.ArgumentParser(description='source breakpoint lookups')
+		parser.add_argument('--breakpoints', type=int, default=10000)
+		parser.add_argument('--files', type=int, default=1000)
+		parser.add_argument('--operations', type=int, default=200, help='number of breakpoints looked up, toggled and moved')
+		parser.add_argument('--gutter', type=int, default=1000, help='number of breakpoints rendered into the gutter of one view')
+		arguments = parser.parse_args()
+
+		ui.Images.shared = ui.Images()
+
+		for kind in (Scan, dap.SourceBreakpoints):
+			results.append(measure(kind, arguments.breakpoints, arguments.files, arguments.operations))
+
+		results.append(gutter(arguments.gutter))
+
+		report('breakpoints', results)
+
+	finally:
+		shutdown()
+
+
+if __name__ == '__main__':
+	main()
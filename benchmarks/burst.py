@@ -0,0 +1,70 @@
+'''
+	Measures the latency of a burst of setBreakpoints requests, like the one sent when a session starts with breakpoints in many files
+
+		python -m benchmarks.burst
+'''
+from __future__ import annotations
+
+import time
+
+from .headless import core, main_thread, run, report, shutdown
+from .transport import Listener, Console, transport
+
+
+def arguments(file: int):
+	return {
+		'source': {'path': f'/src/project/file_{file}.py', 'name': f'file_{file}.py'},
+		'breakpoints': [{'line': line * 10} for line in range(1, 20)],
+		'lines': [line * 10 for line in range(1, 20)],
+		'sourceModified': False,
+	}
+
+
+async def measure(kind: str, count: int, delay: int):
+	stream = transport(kind, 'echo', count, delay)
+	listener = Listener()
+	await stream.start(listener, None, Console())
+
+	callbacks = main_thread.callbacks_run
+	start = time.perf_counter()
+	futures = [stream.send_request('setBreakpoints', arguments(file)) for file in range(count)]
+	sent = time.perf_counter()
+
+	latencies: list[float] = []
+	for future in futures:
+		await future
+		latencies.append(time.perf_counter() - start)
+
+	end = time.perf_counter()
+	await listener.closed
+	stream.dispose()
+
+	latencies.sort()
+	return {
+		'transport': kind,
+		'requests': count,
+		'adapter_delay_ms': delay,
+		'main_thread_send_ms': round((sent - start) * 1000, 2),
+		'first_response_ms': round(latencies[0] * 1000, 2),
+		'median_response_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+		'last_response_ms': round((end - start) * 1000, 2),
+		'main_thread_callbacks': main_thread.callbacks_run - callbacks,
+	}
+
+
+def main():
+	results = []
+	try:
+		for kind in ('stdio', 'socket'):
+			results.append(run(measure(kind, 500, 0)))
+			results.append(run(measure(kind, 500, 100)))
+			results.append(run(measure(kind, 5000, 100)))
+
+		report('burst', results)
+
+	finally:
+		shutdown()
+
+
+if __name__ == '__main__':
+	main()
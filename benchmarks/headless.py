@@ -0,0 +1,303 @@
+'''
+	Runs parts of the debugger outside of Sublime Text so they can be benchmarked
+
+	Importing this module installs minimal `sublime` and `sublime_plugin` modules and imports the package.
+	Anything scheduled on the main thread with `sublime.set_timeout` is run by `run_until`.
+
+	usage from the root of the package:
+		python -m benchmarks.transport
+'''
+from __future__ import annotations
+from typing import Any, Callable
+
+import heapq
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+
+
+class MainThread:
+	def __init__(self) -> None:
+		self.condition = threading.Condition()
+		self.queue: list[tuple[float, int, Callable[[], Any]]] = []
+		self.seq = 0
+		self.callbacks_run = 0
+
+	def set_timeout(self, callback: Callable[[], Any], delay: float = 0):
+		with self.condition:
+			self.seq += 1
+			heapq.heappush(self.queue, (time.perf_counter() + delay / 1000, self.seq, callback))
+			self.condition.notify()
+
+	def run_once(self, timeout: float) -> bool:
+		with self.condition:
+			while True:
+				now = time.perf_counter()
+				if self.queue and self.queue[0][0] <= now:
+					_, _, callback = heapq.heappop(self.queue)
+					break
+
+				wait = timeout - now
+				if self.queue:
+					wait = min(wait, self.queue[0][0] - now)
+				if wait <= 0:
+					return False
+
+				self.condition.wait(wait)
+
+		self.callbacks_run += 1
+		callback()
+		return True
+
+	def run_until(self, done: Callable[[], bool], timeout: float = 60) -> None:
+		deadline = time.perf_counter() + timeout
+		while not done():
+			if not self.run_once(deadline):
+				raise TimeoutError('timed out waiting for the main thread')
+
+
+main_thread = MainThread()
+
+
+class _Module(types.ModuleType):
+	def __getattr__(self, name: str) -> Any:
+		# constants such as sublime.LAYOUT_INLINE
+		if name.isupper():
+			return 0
+
+		# classes such as sublime.View or sublime_plugin.TextCommand
+		value = type(name, (), {})
+		setattr(self, name, value)
+		return value
+
+
+class Region:
+	def __init__(self, a: int, b: int | None = None) -> None:
+		self.a = a
+		self.b = a if b is None else b
+
+	def __eq__(self, other: Any) -> bool:
+		return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+	def __repr__(self) -> str:
+		return f'Region({self.a}, {self.b})'
+
+
+class Settings(dict):
+	def get(self, key: str, default: Any = None) -> Any:
+		return super().get(key, default)
+
+	def set(self, key: str, value: Any) -> None:
+		self[key] = value
+
+	def has(self, key: str) -> bool:
+		return key in self
+
+	def add_on_change(self, key: str, callback: Callable[[], None]) -> None: ...
+
+	def clear_on_change(self, key: str) -> None: ...
+
+
+class Sheet:
+	def __init__(self, view: View) -> None:
+		self._view = view
+
+	def view(self) -> View:
+		return self._view
+
+
+# the only window, there is no active view so anything acting on the active view does nothing
+# every view is selected so every view is visible
+class Window:
+	def __init__(self) -> None:
+		self.views: list[View] = []
+
+	def id(self) -> int:
+		return 1
+
+	def active_view(self) -> None:
+		return None
+
+	def selected_sheets(self) -> list[Sheet]:
+		return [Sheet(view) for view in self.views]
+
+	def active_panel(self) -> str | None:
+		return None
+
+	def status_message(self, message: str) -> None: ...
+
+
+window = Window()
+
+
+# keeps the phantoms and regions added to it so ui.Phantom and the breakpoint gutter can render into it
+# every line is `columns` characters long so points can be converted to rows and columns without any text
+class View:
+	next_id = 0
+	columns = 1000
+
+	def __init__(self, name: str = '', file: str | None = None) -> None:
+		View.next_id += 1
+		self._id = View.next_id
+		self._name = name
+		self._file = file
+		self._settings = Settings()
+		self._change_count = 0
+		self.phantoms: dict[int, tuple[Region, str]] = {}
+		self.phantom_id = 0
+		self.regions: dict[str, list[Region]] = {}
+		self.add_regions_count = 0
+		window.views.append(self)
+
+	def id(self) -> int:
+		return self._id
+
+	def name(self) -> str:
+		return self._name
+
+	def file_name(self) -> str | None:
+		return self._file
+
+	def is_loading(self) -> bool:
+		return False
+
+	def is_valid(self) -> bool:
+		return True
+
+	def change_count(self) -> int:
+		return self._change_count
+
+	def text_point(self, row: int, column: int) -> int:
+		return row * View.columns + column
+
+	def rowcol(self, point: int) -> tuple[int, int]:
+		return divmod(point, View.columns)
+
+	# moves everything after row down as if count lines were inserted there
+	def insert_lines(self, row: int, count: int) -> None:
+		self._change_count += 1
+		start = self.text_point(row, 0)
+		for key, regions in self.regions.items():
+			self.regions[key] = [Region(region.a + count * View.columns) if region.a >= start else region for region in regions]
+
+	# removes count lines starting at row, regions on those lines collapse onto row and regions of a key that end up at the same point are merged
+	def delete_lines(self, row: int, count: int) -> None:
+		self._change_count += 1
+		start = self.text_point(row, 0)
+		end = self.text_point(row + count, 0)
+		for key, regions in self.regions.items():
+			moved = [Region(start if region.a < end else region.a - count * View.columns) if region.a >= start else region for region in regions]
+			self.regions[key] = [region for index, region in enumerate(moved) if index == 0 or region.a != moved[index - 1].a]
+
+	def settings(self) -> Settings:
+		return self._settings
+
+	def window(self) -> Window:
+		return window
+
+	def style(self) -> dict[str, str]:
+		return {'background': '#202020'}
+
+	def viewport_extent(self) -> tuple[float, float]:
+		return (1600, 1000)
+
+	def layout_extent(self) -> tuple[float, float]:
+		return (1600, 1000)
+
+	def em_width(self) -> float:
+		return 8
+
+	def size(self) -> int:
+		return 0
+
+	def add_phantom(self, key: str, region: Region, html: str, layout: int, on_navigate: Any = None) -> int:
+		self.phantom_id += 1
+		self.phantoms[self.phantom_id] = (region, html)
+		return self.phantom_id
+
+	def erase_phantom_by_id(self, id: int) -> None:
+		self.phantoms.pop(id, None)
+
+	def query_phantom(self, id: int) -> list[Region]:
+		return self.query_phantoms([id])
+
+	def query_phantoms(self, ids: list[int]) -> list[Region]:
+		return [self.phantoms[id][0] for id in ids if id in self.phantoms]
+
+	def add_regions(self, key: str, regions: list[Region], *args: Any, **kwargs: Any) -> None:
+		self.add_regions_count += 1
+		self.regions[key] = sorted(regions, key=lambda region: region.a)
+
+	def erase_regions(self, key: str) -> None:
+		self.regions.pop(key, None)
+
+	def get_regions(self, key: str) -> list[Region]:
+		return self.regions.get(key, [])
+
+
+_data_path = tempfile.mkdtemp(prefix='debugger-benchmarks-')
+_settings: dict[str, Settings] = {}
+
+sublime = _Module('sublime')
+sublime.version = lambda: '4200'
+sublime.platform = lambda: {'darwin': 'osx', 'win32': 'windows'}.get(sys.platform, 'linux')
+sublime.arch = lambda: 'x64'
+sublime.packages_path = lambda: os.path.join(_data_path, 'Packages')
+sublime.cache_path = lambda: os.path.join(_data_path, 'Cache')
+sublime.set_timeout = main_thread.set_timeout
+sublime.set_timeout_async = main_thread.set_timeout
+sublime.load_settings = lambda name: _settings.setdefault(name, Settings())
+sublime.save_settings = lambda name: None
+sublime.active_window = lambda: window
+sublime.windows = lambda: []
+sublime.error_message = lambda message: print('error:', message)
+sublime.status_message = lambda message: None
+sublime.load_binary_resource = lambda path: open(os.path.join(_package_path, path.split('/', 2)[2]), 'rb').read()
+sublime.Region = Region
+sublime.Settings = Settings
+sublime.View = View
+sublime.Window = Window
+
+sublime_plugin = _Module('sublime_plugin')
+
+sys.modules.setdefault('sublime', sublime)
+sys.modules.setdefault('sublime_plugin', sublime_plugin)
+
+_package_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_package = os.path.basename(_package_path)
+sys.path.insert(0, os.path.dirname(_package_path))
+
+
+def load(module: str) -> Any:
+	return importlib.import_module(f'{_package}.modules.{module}')
+
+
+core = load('core')
+load('settings').SettingsRegistery.initialize(on_updated=lambda: None)
+dap = load('dap')
+
+
+def run_until(done: Callable[[], bool], timeout: float = 60):
+	main_thread.run_until(done, timeout)
+
+
+def run(awaitable: Any, timeout: float = 60) -> Any:
+	future = core.run(awaitable)
+	run_until(future.done, timeout)
+	return future.result()
+
+
+def shutdown():
+	import atexit
+	asyncio = load('core.asyncio')
+	atexit.unregister(asyncio.shutdown)
+	asyncio.shutdown()
+
+
+def report(name: str, results: Any):
+	print(json.dumps({'benchmark': name, 'results': results}, indent='\t'))
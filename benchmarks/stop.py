@@ -0,0 +1,334 @@
+'''
+	Measures how long it takes from a stopped event until the callstack and variables panels are painted
+
+	A dap.Session is launched against the stress adapter and stepped repeatedly, or launched against a recording with the replay adapter.
+	The callstack and variables views are rendered into phantoms on a headless view the same way the callstack panel renders them.
+	For every stop the time until each threads, stackTrace, scopes and variables request completed and the time until the last render are reported in milliseconds after the stopped event.
+
+		python -m benchmarks.stop
+		python -m benchmarks.stop --stops 50
+		python -m benchmarks.stop --replay ~/recordings/session.dap.gz
+'''
+from __future__ import annotations
+from typing import Any
+
+import argparse
+import os
+import statistics
+import time
+
+from .headless import View, core, dap, load, main_thread, run, report, shutdown
+from .transport import Console
+
+ui = load('ui')
+Watch = load('watch').Watch
+CallstackView = load('views.callstack').CallstackView
+VariablesView = load('views.variables').VariablesView
+
+load('adapters')
+
+phases = ('threads', 'stackTrace', 'scopes', 'variables')
+
+
+class Debugger(dap.Debugger):
+	def __init__(self) -> None:
+		self.on_session_added = core.Event[dap.Session]()
+		self.on_session_removed = core.Event[dap.Session]()
+		self.on_session_active = core.Event[dap.Session]()
+		self.on_session_thread_or_frame_updated = core.Event[dap.Session]()
+
+		self.on_session_output = core.Event[dap.Session, Any]()
+		self.on_session_updated = core.Event[dap.Session]()
+		self.on_session_modules_updated = core.Event[dap.Session]()
+		self.on_session_sources_updated = core.Event[dap.Session]()
+		self.on_session_variables_updated = core.Event[dap.Session]()
+		self.on_session_threads_updated = core.Event[dap.Session]()
+
+		self.sessions: list[dap.Session] = []
+		self.session: dap.Session | None = None
+
+		self.console = Console()
+		self.breakpoints = dap.Breakpoints()
+		self.watch = Watch(self)
+
+	@property
+	def current_session(self) -> dap.Session:
+		if not self.session:
+			raise dap.NoActiveSessionError('No active debug session')
+		return self.session
+
+	@current_session.setter
+	def current_session(self, session: dap.Session):
+		self.session = session
+		self.on_session_updated(session)
+		self.on_session_active(session)
+
+	# the same wiring as Debugger.launch without stopping existing sessions
+	def create_session(self, adapter: dap.Adapter, configuration: dap.ConfigurationExpanded) -> dap.Session:
+		session = dap.Session(adapter=adapter, configuration=configuration, restart=None, no_debug=False, debugger=self)
+
+		session.on_updated_modules = self.on_session_modules_updated
+		session.on_updated_sources = self.on_session_sources_updated
+		session.on_updated_threads = self.on_session_threads_updated
+		session.on_updated_variables = self.on_session_variables_updated
+		session.on_updated = self.on_session_updated
+		session.on_output = self.on_session_output
+		session.on_updated_thread_or_frame = self.on_session_thread_or_frame_updated
+		session.on_finished = self.remove_session
+
+		self.sessions.append(session)
+		self.session = session
+
+		self.on_session_added(session)
+		self.on_session_active(session)
+		return session
+
+	def remove_session(self, session: dap.Session):
+		self.sessions.remove(session)
+		if self.session is session:
+			self.session = None
+
+		self.on_session_removed(session)
+		session.dispose()
+
+	def show_disassembly(self): ...
+
+	def show_memory(self, reference: str): ...
+
+	def run_action(self, action: Any): ...
+
+
+class Stop:
+	def __init__(self, reason: str) -> None:
+		self.reason = reason
+		self.time = time.perf_counter()
+		self.callbacks = main_thread.callbacks_run
+
+		# command -> list of (sent, completed) in seconds after the stop
+		self.requests: dict[str, list[tuple[float, float]]] = {}
+
+		# (started, duration) of each ViewRegistry.render_layouts in seconds after the stop
+		self.renders: list[tuple[float, float]] = []
+
+		self.html: dict[str, int] = {}
+
+	def request(self, command: str, sent: float, completed: float):
+		self.requests.setdefault(command, []).append((sent - self.time, completed - self.time))
+
+	def rendered(self, started: float, completed: float):
+		self.renders.append((started - self.time, completed - started))
+
+	def painted(self) -> float:
+		if not self.renders:
+			return 0
+		started, duration = self.renders[-1]
+		return started + duration
+
+	def results(self) -> dict[str, Any]:
+		results: dict[str, Any] = {
+			'reason': self.reason,
+			'stop_to_paint_ms': milliseconds(self.painted()),
+		}
+
+		for phase in phases:
+			requests = self.requests.get(phase, [])
+			results[phase] = {
+				'requests': len(requests),
+				'first_sent_ms': milliseconds(min((sent for sent, _ in requests), default=0)),
+				'completed_ms': milliseconds(max((completed for _, completed in requests), default=0)),
+			}
+
+		results['render'] = {
+			'renders': len(self.renders),
+			'total_ms': milliseconds(sum(duration for _, duration in self.renders)),
+			'slowest_ms': milliseconds(max((duration for _, duration in self.renders), default=0)),
+		}
+		results['html_kb'] = {name: round(size / 1024, 1) for name, size in self.html.items()}
+		results['main_thread_callbacks'] = main_thread.callbacks_run - self.callbacks
+		return results
+
+
+def milliseconds(seconds: float):
+	return round(seconds * 1000, 2)
+
+
+class Timeline:
+	def __init__(self) -> None:
+		self.stops: list[Stop] = []
+		self.current: Stop | None = None
+
+		render_layouts = ui.ViewRegistry.render_layouts
+
+		def render_layouts_timed():
+			started = time.perf_counter()
+			render_layouts()
+			if stop := self.current:
+				stop.rendered(started, time.perf_counter())
+				stop.html = {layout.stats.name: len(layout.html) for layout in ui.ViewRegistry.layouts}
+
+		ui.ViewRegistry.render_layouts = staticmethod(render_layouts_timed)
+
+	def instrument(self, session: dap.Session):
+		on_event = session.on_event
+		request = session._request
+
+		def on_event_timed(event: str, body: Any):
+			if event == 'stopped':
+				self.current = Stop(body.get('reason', ''))
+				self.stops.append(self.current)
+
+			on_event(event, body)
+
+		# requests are attributed to the stop they were sent after
+		async def request_timed(command: str, arguments: Any):
+			stop = self.current
+			sent = time.perf_counter()
+			try:
+				return await request(command, arguments)
+			finally:
+				if stop:
+					stop.request(command, sent, time.perf_counter())
+
+		session.on_event = on_event_timed
+		session._request = request_timed
+
+
+# runs the main thread until nothing has run for `quiet` seconds and the session is not waiting on any responses
+def settle(session: dap.Session, quiet: float = 0.05, timeout: float = 60):
+	deadline = time.perf_counter() + timeout
+	while main_thread.run_once(time.perf_counter() + quiet) or session.requests_in_flight:
+		if time.perf_counter() > deadline:
+			raise TimeoutError('timed out waiting for the session to settle')
+
+
+def panels(debugger: Debugger):
+	view = View('Debugger Callstack')
+	phantoms: list[Any] = []
+
+	with ui.Phantom(view, 3, name='Callstack') as phantom:
+		phantoms.append(phantom)
+		CallstackView(debugger)
+
+	with ui.Phantom(view, 5, name='Variables') as phantom:
+		phantoms.append(phantom)
+		VariablesView(debugger)
+
+	return phantoms
+
+
+def configuration(json: dict[str, Any]):
+	return dap.ConfigurationExpanded(dap.Configuration.from_json(json, 0), {}, json)
+
+
+def summary(stops: list[dict[str, Any]]):
+	if not stops:
+		return {}
+
+	results: dict[str, Any] = {
+		'stops': len(stops),
+		'median_stop_to_paint_ms': round(statistics.median(stop['stop_to_paint_ms'] for stop in stops), 2),
+		'max_stop_to_paint_ms': max(stop['stop_to_paint_ms'] for stop in stops),
+	}
+	for phase in phases:
+		results[f'median_{phase}_ms'] = round(statistics.median(stop[phase]['completed_ms'] for stop in stops), 2)
+
+	results['median_render_ms'] = round(statistics.median(stop['render']['total_ms'] for stop in stops), 2)
+	results['html_kb'] = stops[-1]['html_kb']
+	return results
+
+
+def measure(name: str, json: dict[str, Any], stops: int):
+	debugger = Debugger()
+	timeline = Timeline()
+	phantoms = panels(debugger)
+
+	session = debugger.create_session(dap.Adapter.get(json['type']), configuration(json))
+	timeline.instrument(session)
+	launching = core.run(session.launch())
+
+	try:
+		if json['type'] == 'replay':
+			# the recording decides when the session stops
+			run(launching, timeout=600)
+			main_thread.run_until(lambda: not debugger.sessions, timeout=600)
+		else:
+			run(launching)
+			main_thread.run_until(lambda: bool(timeline.stops))
+			settle(session)
+			timeline.current = None
+
+			for _ in range(stops):
+				count = len(timeline.stops)
+				core.run(session.step_over())
+				main_thread.run_until(lambda: len(timeline.stops) > count)
+				settle(session)
+				timeline.current = None
+
+			# the terminated event can finish the session before the terminate request gets a response so wait for the session to be removed instead
+			core.run(session.stop())
+			main_thread.run_until(lambda: not debugger.sessions)
+
+	finally:
+		timeline.current = None
+		for phantom in phantoms:
+			phantom.dispose()
+
+		ui.ViewRegistry.render_layouts()
+		debugger.breakpoints.dispose()
+
+	results = [stop.results() for stop in timeline.stops]
+	return {
+		'name': name,
+		'configuration': json,
+		# the first stop includes launching the session and the first render of everything
+		'summary': summary(results[1:] or results),
+		'stops': results,
+	}
+
+
+def stress(name: str, stops: int, **arguments: Any):
+	json = {
+		'name': name,
+		'type': 'stress',
+		'request': 'launch',
+		'modules': 0,
+		'loaded_sources': 0,
+		**arguments,
+	}
+	return measure(name, json, stops)
+
+
+def main():
+	# the headless main loop is already running so shutdown must run even when argparse exits for --help
+	results = []
+	try:
+		parser = argparse.ArgumentParser(description='stop to paint latency')
+		parser.add_argument('--stops', type=int, default=20, help='number of times to step the stress adapter')
+		parser.add_argument('--replay', help='measure every stop in a recording made with the protocol_recording_directory setting instead')
+		arguments = parser.parse_args()
+
+		ui.Images.shared = ui.Images()
+
+		if arguments.replay:
+			json = {
+				'name': 'replay',
+				'type': 'replay',
+				'request': 'launch',
+				'recording': os.path.expanduser(arguments.replay),
+				'speed': None,
+				'wait': 0.1,
+			}
+			results.append(measure('replay', json, 0))
+		else:
+			results.append(stress('small', arguments.stops, threads=1, stack_depth=20, variables=20, variable_depth=2, indexed_variables=0))
+			results.append(stress('default', arguments.stops))
+			results.append(stress('large', arguments.stops, threads=64, stack_depth=1000, variables=1000, indexed_variables=100000))
+
+		report('stop', results)
+
+	finally:
+		shutdown()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,111 @@
+'''
+	A synthetic debug adapter that floods the client with messages, it does not import anything from the package
+
+		python synthetic_adapter.py events 10000 200            # sends 10000 output events with 200 bytes of output each
+		python synthetic_adapter.py response 1 4000000          # answers the first request with a ~4MB variables response
+		python synthetic_adapter.py echo 500 100                # waits 100ms then answers 500 requests with empty responses
+		python synthetic_adapter.py events 10000 200 --port 0   # same as above but serves the client on a socket
+'''
+from __future__ import annotations
+from typing import Any, Callable
+
+import json
+import socket
+import sys
+import time
+
+
+def frame(message: Any) -> bytes:
+	content = json.dumps(message).encode('utf-8')
+	return b'Content-Length: %d\r\n\r\n%s' % (len(content), content)
+
+
+def read_message(read: Callable[[int], bytes]) -> Any:
+	header = b''
+	while not header.endswith(b'\r\n\r\n'):
+		data = read(1)
+		if not data:
+			raise EOFError
+		header += data
+
+	size = int(header.split(b':')[1].strip())
+	content = b''
+	while len(content) < size:
+		data = read(size - len(content))
+		if not data:
+			raise EOFError
+		content += data
+
+	return json.loads(content)
+
+
+def events(count: int, size: int, write: Callable[[bytes], Any]):
+	output = 'x' * size
+	batch: list[bytes] = []
+
+	for seq in range(count):
+		batch.append(frame({'seq': seq, 'type': 'event', 'event': 'output', 'body': {'category': 'stdout', 'output': output}}))
+		if len(batch) == 100:
+			write(b''.join(batch))
+			batch.clear()
+
+	write(b''.join(batch))
+
+
+def response(count: int, size: int, read: Callable[[int], bytes], write: Callable[[bytes], Any]):
+	for seq in range(count):
+		request = read_message(read)
+
+		variables: list[Any] = []
+		total = 0
+		while total < size:
+			variable = {'name': f'[{len(variables)}]', 'value': f'{len(variables) * 31}', 'type': 'int', 'variablesReference': 0, 'evaluateName': f'array[{len(variables)}]'}
+			variables.append(variable)
+			total += 100
+
+		write(frame({'seq': seq, 'type': 'response', 'request_seq': request['seq'], 'command': request['command'], 'success': True, 'body': {'variables': variables}}))
+
+
+def echo(count: int, delay: int, read: Callable[[int], bytes], write: Callable[[bytes], Any]):
+	time.sleep(delay / 1000)
+
+	for seq in range(count):
+		request = read_message(read)
+		write(frame({'seq': seq, 'type': 'response', 'request_seq': request['seq'], 'command': request['command'], 'success': True, 'body': {}}))
+
+
+def serve(mode: str, count: int, size: int, read: Callable[[int], bytes], write: Callable[[bytes], Any]):
+	if mode == 'events':
+		events(count, size, write)
+	elif mode == 'response':
+		response(count, size, read, write)
+	elif mode == 'echo':
+		echo(count, size, read, write)
+	else:
+		raise ValueError(f'unknown mode {mode}')
+
+
+def main(argv: list[str]):
+	mode, count, size = argv[0], int(argv[1]), int(argv[2])
+
+	if '--port' in argv:
+		port = int(argv[argv.index('--port') + 1])
+		server = socket.create_server(('localhost', port))
+		connection, _ = server.accept()
+		with connection:
+			serve(mode, count, size, connection.recv, connection.sendall)
+		server.close()
+		return
+
+	stdin = sys.stdin.buffer
+	stdout = sys.stdout.buffer
+
+	def write(data: bytes):
+		stdout.write(data)
+		stdout.flush()
+
+	serve(mode, count, size, stdin.read, write)
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,142 @@
+'''
+	Measures how fast TransportStream reads messages from an adapter over stdio and sockets
+
+		python -m benchmarks.transport
+'''
+from __future__ import annotations
+from typing import Any
+
+import io
+import os
+import socket
+import sys
+import time
+
+from .headless import core, dap, load, main_thread, run, report, shutdown
+from . import synthetic_adapter
+
+
+adapter = os.path.join(os.path.dirname(__file__), 'synthetic_adapter.py')
+
+
+class Console(dap.Console):
+	def log(self, type: str, value: Any, source: Any = None, session: Any = None):
+		...
+
+
+class Listener(dap.TransportListener):
+	def __init__(self) -> None:
+		self.events = 0
+		self.closed = core.Future()
+
+	def on_event(self, event: str, body: Any):
+		self.events += 1
+
+	async def on_reverse_request(self, command: str, arguments: Any) -> Any:
+		return {}
+
+	def on_transport_closed(self):
+		self.closed.set_result(None)
+
+
+def open_port() -> int:
+	with socket.socket() as s:
+		s.bind(('localhost', 0))
+		return s.getsockname()[1]
+
+
+def transport(kind: str, mode: str, count: int, size: int) -> dap.Transport:
+	command = [sys.executable, adapter, mode, str(count), str(size)]
+	if kind == 'stdio':
+		return dap.StdioTransport(command, cwd=os.getcwd())
+
+	port = open_port()
+	return dap.SocketTransport(port=port, command=command + ['--port', str(port)], cwd=os.getcwd())
+
+
+async def measure(kind: str, mode: str, count: int, size: int):
+	stream = transport(kind, mode, count, size)
+	listener = Listener()
+
+	await stream.start(listener, None, Console())
+	start = time.perf_counter()
+	callbacks = main_thread.callbacks_run
+
+	if mode == 'response':
+		for _ in range(count):
+			await stream.send_request('variables', {'variablesReference': 1})
+
+	await listener.closed
+	elapsed = time.perf_counter() - start
+	stream.dispose()
+
+	megabytes = stream.reader.bytes_read / (1024 * 1024)
+	return {
+		'transport': kind,
+		'mode': mode,
+		'messages': stream.reader.messages_read,
+		'megabytes': round(megabytes, 2),
+		'seconds': round(elapsed, 3),
+		'mb_per_second': round(megabytes / elapsed, 2),
+		'messages_per_second': round(stream.reader.messages_read / elapsed),
+		'main_thread_callbacks': main_thread.callbacks_run - callbacks,
+	}
+
+
+# framing only, messages are parsed from chunks of an in memory stream without a process or the main thread involved
+def measure_reader(mode: str, count: int, size: int):
+	written: list[bytes] = []
+	requests = io.BytesIO(b''.join(synthetic_adapter.frame({'seq': seq, 'command': 'variables'}) for seq in range(count)))
+	synthetic_adapter.serve(mode, count, size, requests.read, written.append)
+	data = memoryview(b''.join(written))
+
+	reader = load('dap.transport').TransportFrameReader()
+	position = 0
+
+	def readinto(buffer: memoryview) -> int:
+		nonlocal position
+		n = min(len(buffer), len(data) - position)
+		buffer[:n] = data[position:position + n]
+		position += n
+		return n
+
+	start = time.perf_counter()
+	messages = 0
+	while position < len(data):
+		reader.read(readinto)
+		for message in reader.messages():
+			messages += 1
+
+	elapsed = time.perf_counter() - start
+	megabytes = len(data) / (1024 * 1024)
+	return {
+		'transport': 'reader',
+		'mode': mode,
+		'messages': messages,
+		'megabytes': round(megabytes, 2),
+		'seconds': round(elapsed, 3),
+		'mb_per_second': round(megabytes / elapsed, 2),
+		'messages_per_second': round(messages / elapsed),
+	}
+
+
+def main():
+	results = []
+	try:
+		results.append(measure_reader('events', 100000, 20))
+		results.append(measure_reader('response', 1, 8 * 1024 * 1024))
+
+		for kind in ('stdio', 'socket'):
+			results.append(run(measure(kind, 'events', 20000, 200)))
+			results.append(run(measure(kind, 'events', 100000, 20)))
+			results.append(run(measure(kind, 'response', 1, 8 * 1024 * 1024)))
+			results.append(run(measure(kind, 'response', 10, 1024 * 1024)))
+
+		report('transport', results)
+
+	finally:
+		shutdown()
+
+
+if __name__ == '__main__':
+	main()
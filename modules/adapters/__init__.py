@@ -18,6 +18,8 @@ from .js import Edge
 from .firefox import Firefox
 
 from .mock import Mock
+from .replay import Replay
+from .stress import Stress
 
 from .sublime_adapter import Sublime
 
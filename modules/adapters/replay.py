@@ -0,0 +1,57 @@
+from __future__ import annotations
+from typing import Any
+
+import os
+
+from .. import dap
+
+
+class Replay(dap.Adapter):
+	type = 'replay'
+	development = True
+
+	@property
+	def configuration_snippets(self) -> list[dict[str, Any]]:
+		return [
+			{
+				'label': 'Replay Recording',
+				'body': {
+					'name': 'Replay Recording',
+					'type': 'replay',
+					'request': 'launch',
+					'recording': '${1:path to .dap.gz recording}',
+					'speed': 1,
+				},
+			}
+		]
+
+	@property
+	def configuration_schema(self) -> dict[str, Any]:
+		return {
+			'launch': {
+				'required': ['recording'],
+				'properties': {
+					'recording': {
+						'type': 'string',
+						'description': 'Recording to play back, recordings are made by setting `protocol_recording_directory` in the debugger settings.',
+					},
+					'speed': {
+						'type': ['number', 'null'],
+						'description': 'Playback speed, 1 is real time and null plays the recording back as fast as possible.',
+						'default': 1,
+					},
+					'wait': {
+						'type': 'number',
+						'description': 'Seconds to wait for the session to send each recorded request before skipping it',
+						'default': 5,
+					},
+				},
+			}
+		}
+
+	async def start(self, console: dap.Console, configuration: dap.ConfigurationExpanded):
+		recording = configuration.get('recording')
+		if not recording:
+			raise dap.Error('`recording` is required')
+
+		return dap.ReplayTransport(os.path.expanduser(recording), configuration.get('speed', 1), configuration.get('wait', 5))
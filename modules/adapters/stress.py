@@ -0,0 +1,73 @@
+from __future__ import annotations
+from typing import Any
+
+import os
+import shutil
+
+from .. import dap
+
+
+class Stress(dap.Adapter):
+	type = 'stress'
+	development = True
+
+	@property
+	def configuration_snippets(self) -> list[dict[str, Any]]:
+		return [
+			{
+				'label': 'Stress Test',
+				'body': {
+					'name': 'Stress Test',
+					'type': 'stress',
+					'request': 'launch',
+					'threads': 8,
+					'stack_depth': 100,
+					'variables': 100,
+					'variable_depth': 6,
+					'indexed_variables': 10000,
+					'output_per_second': 0,
+					'modules': 1000,
+					'loaded_sources': 1000,
+				},
+			}
+		]
+
+	@property
+	def configuration_schema(self) -> dict[str, Any]:
+		def integer(description: str, default: int):
+			return {'type': 'integer', 'description': description, 'default': default}
+
+		return {
+			'launch': {
+				'properties': {
+					'python': {
+						'type': 'string',
+						'description': 'Python 3 used to run the stress adapter, defaults to python3 or python in your path',
+					},
+					'threads': integer('Number of threads', 8),
+					'stack_depth': integer('Number of frames in each stack trace', 100),
+					'variables': integer('Number of variables in each scope and object, every fourth one is an object', 100),
+					'variable_depth': integer('How many levels of nested objects there are', 6),
+					'indexed_variables': integer('Number of items in the array every object contains', 10000),
+					'output_per_second': integer('Number of output events sent every second', 0),
+					'output_size': integer('Number of characters in each output event', 80),
+					'modules': integer('Number of modules', 1000),
+					'loaded_sources': integer('Number of loaded sources', 1000),
+					'source_lines': integer('Number of lines in each source', 1000),
+					'stop_after': integer('Milliseconds to run for after continuing before stopping again', 100),
+					'stop_on_entry': {
+						'type': 'boolean',
+						'description': 'Stop after launching',
+						'default': True,
+					},
+				},
+			}
+		}
+
+	async def start(self, console: dap.Console, configuration: dap.ConfigurationExpanded):
+		python = configuration.get('python') or shutil.which('python3') or shutil.which('python')
+		if not python:
+			raise dap.Error('Unable to find `python3` or `python`')
+
+		adapter = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'stress_adapter.py')
+		return dap.StdioTransport([python, adapter], cwd=os.path.dirname(adapter))
@@ -0,0 +1,363 @@
+'''
+	A debug adapter that generates as much data as it is configured to for load testing the debugger
+
+	This runs as its own process and only uses the standard library, it is started by the `stress` adapter in stress.py.
+	Everything it reports is generated on demand from the launch configuration so it can simulate any number of threads, frames, variables, modules or sources without keeping them in memory.
+'''
+from __future__ import annotations
+from typing import Any, Callable
+
+import base64
+import json
+import sys
+import threading
+import time
+
+
+class Connection:
+	def __init__(self) -> None:
+		self.stdin = sys.stdin.buffer
+		self.stdout = sys.stdout.buffer
+		self.lock = threading.Lock()
+		self.seq = 0
+
+	def read(self) -> dict[str, Any] | None:
+		length = 0
+		while True:
+			line = self.stdin.readline()
+			if not line:
+				return None
+
+			line = line.strip()
+			if not line:
+				break
+
+			name, _, value = line.partition(b':')
+			if name.strip().lower() == b'content-length':
+				length = int(value)
+
+		return json.loads(self.stdin.read(length))
+
+	def write(self, message: dict[str, Any]):
+		with self.lock:
+			self.seq += 1
+			message['seq'] = self.seq
+			content = json.dumps(message).encode('utf-8')
+			self.stdout.write(b'Content-Length: %d\r\n\r\n%s' % (len(content), content))
+			self.stdout.flush()
+
+	def event(self, event: str, body: dict[str, Any] | None = None):
+		self.write({'type': 'event', 'event': event, 'body': body or {}})
+
+	def response(self, request: dict[str, Any], body: dict[str, Any] | None = None, error: str | None = None):
+		self.write({
+			'type': 'response',
+			'request_seq': request['seq'],
+			'command': request['command'],
+			'success': error is None,
+			'message': error,
+			'body': body or {},
+		})
+
+
+class StressAdapter:
+	def __init__(self, connection: Connection) -> None:
+		self.connection = connection
+		self.running = True
+
+		self.threads = 8
+		self.stack_depth = 100
+		self.variables = 100
+		self.variable_depth = 6
+		self.indexed_variables = 10000
+		self.output_per_second = 0
+		self.output_size = 80
+		self.modules = 1000
+		self.loaded_sources = 1000
+		self.source_lines = 1000
+		self.stop_on_entry = True
+		self.stop_after = 100
+
+		# variablesReference -> (frame id, path of the container)
+		self.references: dict[int, tuple[int, str]] = {}
+		self.stop_count = 0
+
+		self.output_thread: threading.Thread | None = None
+		self.stop_timer: threading.Timer | None = None
+
+	def configure(self, arguments: dict[str, Any]):
+		for key in ('threads', 'stack_depth', 'variables', 'variable_depth', 'indexed_variables', 'output_per_second', 'output_size', 'modules', 'loaded_sources', 'source_lines', 'stop_after'):
+			if key in arguments:
+				setattr(self, key, int(arguments[key]))
+
+		self.stop_on_entry = arguments.get('stop_on_entry', self.stop_on_entry)
+
+	def run(self):
+		while self.running:
+			request = self.connection.read()
+			if request is None:
+				break
+
+			if request.get('type') != 'request':
+				continue
+
+			command = request['command']
+			handler: Callable[[dict[str, Any]], Any] | None = getattr(self, f'on_{command}', None)
+			if not handler:
+				self.connection.response(request, error=f'{command} is not supported by the stress adapter')
+				continue
+
+			try:
+				body = handler(request.get('arguments') or {})
+				self.connection.response(request, body)
+			except Exception as e:
+				self.connection.response(request, error=str(e))
+
+			if command == 'initialize':
+				self.connection.event('initialized')
+			if command == 'configurationDone':
+				self.started()
+
+		self.running = False
+
+	def started(self):
+		for id in range(self.modules):
+			self.connection.event('module', {'reason': 'new', 'module': self.module(id)})
+
+		for id in range(self.loaded_sources):
+			self.connection.event('loadedSource', {'reason': 'new', 'source': self.source(id)})
+
+		for id in range(1, self.threads + 1):
+			self.connection.event('thread', {'reason': 'started', 'threadId': id})
+
+		if self.output_per_second:
+			self.output_thread = threading.Thread(target=self.write_output, daemon=True)
+			self.output_thread.start()
+
+		if self.stop_on_entry:
+			self.stop('entry')
+		else:
+			self.resume()
+
+	def write_output(self):
+		interval = 1 / self.output_per_second
+		count = 0
+		line = 'x' * max(self.output_size - 1, 0)
+		while self.running:
+			count += 1
+			self.connection.event('output', {'category': 'stdout', 'output': f'{count} {line}\n'})
+			time.sleep(interval)
+
+	def stop(self, reason: str):
+		self.stop_count += 1
+		self.references.clear()
+		self.connection.event('stopped', {'reason': reason, 'threadId': 1, 'allThreadsStopped': True})
+
+	# runs for stop_after milliseconds and stops again
+	def resume(self):
+		if self.stop_timer:
+			self.stop_timer.cancel()
+
+		self.stop_timer = threading.Timer(self.stop_after / 1000, lambda: self.stop('breakpoint'))
+		self.stop_timer.daemon = True
+		self.stop_timer.start()
+
+	def module(self, id: int):
+		return {'id': id, 'name': f'module_{id}.so', 'path': f'/stress/lib/module_{id}.so', 'version': '1.0.0', 'symbolStatus': 'Symbols loaded.'}
+
+	def source(self, id: int):
+		return {'name': f'file_{id}.py', 'path': f'/stress/src/file_{id}.py', 'sourceReference': id + 1}
+
+	def reference(self, frame: int, path: str) -> int:
+		reference = len(self.references) + 1
+		self.references[reference] = (frame, path)
+		return reference
+
+	# requests
+
+	def on_initialize(self, arguments: dict[str, Any]):
+		return {
+			'supportsConfigurationDoneRequest': True,
+			'supportsDelayedStackTraceLoading': True,
+			'supportsEvaluateForHovers': True,
+			'supportsSetVariable': True,
+			'supportsLoadedSourcesRequest': True,
+			'supportsModulesRequest': True,
+			'supportsReadMemoryRequest': True,
+			'supportsDisassembleRequest': True,
+			'supportsCancelRequest': True,
+			'supportsTerminateRequest': True,
+		}
+
+	def on_launch(self, arguments: dict[str, Any]):
+		self.configure(arguments)
+
+	def on_attach(self, arguments: dict[str, Any]):
+		self.configure(arguments)
+
+	def on_configurationDone(self, arguments: dict[str, Any]):
+		...
+
+	def on_setBreakpoints(self, arguments: dict[str, Any]):
+		return {'breakpoints': [{'verified': True, 'line': breakpoint['line']} for breakpoint in arguments.get('breakpoints', [])]}
+
+	def on_setFunctionBreakpoints(self, arguments: dict[str, Any]):
+		return {'breakpoints': [{'verified': True} for _ in arguments.get('breakpoints', [])]}
+
+	def on_setExceptionBreakpoints(self, arguments: dict[str, Any]):
+		...
+
+	def on_threads(self, arguments: dict[str, Any]):
+		return {'threads': [{'id': id, 'name': f'Thread {id}'} for id in range(1, self.threads + 1)]}
+
+	def on_stackTrace(self, arguments: dict[str, Any]):
+		thread = arguments['threadId']
+		start = arguments.get('startFrame') or 0
+		levels = arguments.get('levels') or self.stack_depth
+		end = min(start + levels, self.stack_depth)
+
+		frames = []
+		for index in range(start, end):
+			source = (thread * 31 + index) % max(self.loaded_sources, 1)
+			frames.append({
+				'id': thread * 100000 + index,
+				'name': f'function_{index}(thread={thread})',
+				'source': self.source(source),
+				'line': (index * 7) % self.source_lines + 1,
+				'column': 1,
+				'instructionPointerReference': hex(0x100000 + index * 16),
+			})
+
+		return {'stackFrames': frames, 'totalFrames': self.stack_depth}
+
+	def on_scopes(self, arguments: dict[str, Any]):
+		frame = arguments['frameId']
+		return {
+			'scopes': [
+				{'name': 'Locals', 'variablesReference': self.reference(frame, 'locals'), 'namedVariables': self.variables, 'expensive': False},
+				{'name': 'Globals', 'variablesReference': self.reference(frame, 'globals'), 'namedVariables': self.variables, 'expensive': True},
+			]
+		}
+
+	def on_variables(self, arguments: dict[str, Any]):
+		frame, path = self.references[arguments['variablesReference']]
+		depth = path.count('.')
+		filter = arguments.get('filter')
+
+		# the last child of every container is an array with indexed_variables items
+		if path.endswith(']'):
+			if filter == 'named':
+				return {'variables': []}
+
+			start = arguments.get('start') or 0
+			count = arguments.get('count') or self.indexed_variables
+			end = min(start + count, self.indexed_variables)
+			return {'variables': [{'name': f'[{index}]', 'value': str(index * 3), 'type': 'int', 'variablesReference': 0, 'evaluateName': f'{path}[{index}]'} for index in range(start, end)]}
+
+		if filter == 'indexed':
+			return {'variables': []}
+
+		variables = []
+		for index in range(self.variables):
+			name = f'{path}.item_{index}'
+			container = depth < self.variable_depth and index % 4 == 0
+			variables.append({
+				'name': f'item_{index}',
+				'value': f'{{...}} stop={self.stop_count}' if container else f'{index * self.stop_count}',
+				'type': 'object' if container else 'int',
+				'evaluateName': name,
+				'variablesReference': self.reference(frame, name) if container else 0,
+				'memoryReference': hex(0x200000 + index * 8),
+			})
+
+		if depth < self.variable_depth and self.indexed_variables:
+			name = f'{path}.array[]'
+			variables.append({
+				'name': 'array',
+				'value': f'array[{self.indexed_variables}]',
+				'type': 'array',
+				'evaluateName': name,
+				'variablesReference': self.reference(frame, name),
+				'indexedVariables': self.indexed_variables,
+			})
+
+		return {'variables': variables}
+
+	def on_setVariable(self, arguments: dict[str, Any]):
+		return {'value': arguments['value']}
+
+	def on_evaluate(self, arguments: dict[str, Any]):
+		expression = arguments['expression']
+		frame = arguments.get('frameId') or 0
+		return {'result': f'{expression} = {len(expression) * self.stop_count}', 'variablesReference': self.reference(frame, expression)}
+
+	def on_source(self, arguments: dict[str, Any]):
+		reference = arguments.get('sourceReference') or 0
+		return {'content': ''.join(f'def function_{line}(): # file {reference} line {line}\n' for line in range(1, self.source_lines + 1))}
+
+	def on_loadedSources(self, arguments: dict[str, Any]):
+		return {'sources': [self.source(id) for id in range(self.loaded_sources)]}
+
+	def on_modules(self, arguments: dict[str, Any]):
+		start = arguments.get('startModule') or 0
+		count = arguments.get('moduleCount') or self.modules
+		return {'modules': [self.module(id) for id in range(start, min(start + count, self.modules))], 'totalModules': self.modules}
+
+	def on_readMemory(self, arguments: dict[str, Any]):
+		address = int(arguments['memoryReference'], 0) + (arguments.get('offset') or 0)
+		count = arguments['count']
+		data = bytes((address + i) & 0xff for i in range(count))
+		return {'address': hex(address), 'data': base64.b64encode(data).decode('ascii')}
+
+	def on_disassemble(self, arguments: dict[str, Any]):
+		address = int(arguments['memoryReference'], 0) + (arguments.get('offset') or 0)
+		start = arguments.get('instructionOffset') or 0
+		count = arguments['instructionCount']
+
+		instructions = []
+		for index in range(start, start + count):
+			instruction_address = address + index * 4
+			instructions.append({
+				'address': hex(instruction_address),
+				'instructionBytes': f'{instruction_address & 0xff:02x} 00 00 00',
+				'instruction': f'mov r{index % 16}, #{index}',
+			})
+
+		return {'instructions': instructions}
+
+	def on_continue(self, arguments: dict[str, Any]):
+		self.resume()
+		return {'allThreadsContinued': True}
+
+	def on_next(self, arguments: dict[str, Any]):
+		self.step()
+
+	def on_stepIn(self, arguments: dict[str, Any]):
+		self.step()
+
+	def on_stepOut(self, arguments: dict[str, Any]):
+		self.step()
+
+	def step(self):
+		timer = threading.Timer(0.001, lambda: self.stop('step'))
+		timer.daemon = True
+		timer.start()
+
+	def on_pause(self, arguments: dict[str, Any]):
+		if self.stop_timer:
+			self.stop_timer.cancel()
+
+		self.stop('pause')
+
+	def on_cancel(self, arguments: dict[str, Any]):
+		...
+
+	def on_terminate(self, arguments: dict[str, Any]):
+		self.connection.event('terminated')
+
+	def on_disconnect(self, arguments: dict[str, Any]):
+		self.running = False
+
+
+if __name__ == '__main__':
+	StressAdapter(Connection()).run()
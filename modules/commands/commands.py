@@ -178,6 +178,20 @@ class ShowProtocol(Action):
 		debugger.console.protocol.open()
 
 
+class ShowRequests(Action):
+	name = 'Show Pending Requests'
+	key = 'show_requests'
+
+	def action(self, debugger: Debugger):
+		if not debugger.sessions:
+			debugger.console.info('No active debug sessions')
+
+		for session in debugger.sessions:
+			debugger.console.info(session.request_stats())
+
+		debugger.console.open()
+
+
 class ForceSave(Action):
 	name = 'Force Save'
 	key = 'save_data'
@@ -20,6 +20,7 @@ from .asyncio import (
 	delay,
 	run,
 	run_in_executor,
+	shield,
 	gather,
 	gather_results,
 )
@@ -237,6 +237,10 @@ def delay(seconds: float) -> Awaitable[None]:
 	return future
 
 
+def shield(future: Awaitable[T]) -> Awaitable[T]:
+	return asyncio.shield(future)
+
+
 def gather(*coros_or_futures: Awaitable[T]) -> Awaitable[tuple[T]]:
 	return asyncio.gather(*coros_or_futures)  # type: ignore
 
@@ -58,12 +58,14 @@ from .debugger import (
 from .transport import (
 	Transport,
 	TransportListener,
+	TransportDataLog,
 )
 
 from .transports import (
 	Process,
 	StdioTransport,
 	SocketTransport,
+	ReplayTransport,
 	TransportOutputLog,
 )
 
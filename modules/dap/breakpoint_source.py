@@ -1,14 +1,17 @@
 from __future__ import annotations
-from typing import Any, Callable
+from typing import Any
 
 from .session import Session
 
 from .. import core
 from .. import ui
+from ..settings import Settings
 from . import api
 
 import sublime
+import bisect
 import os
+import time
 
 from .breakpoint import Breakpoint
 
@@ -22,8 +25,6 @@ class SourceBreakpoint(Breakpoint):
 
 		SourceBreakpoint.next_id += 1
 		self.id = SourceBreakpoint.next_id
-		self.region_name = 'bp{}'.format(self.id)
-		self.phantoms: list[SourceBreakpointGutterPhantom] = []
 
 		self.dap = api.SourceBreakpoint(line, column, None, None, None)
 		self._file = file
@@ -96,106 +97,303 @@ class SourceBreakpoint(Breakpoint):
 	def scope(self):
 		return 'text'
 
-	def update_views(self):
-		for phantom in self.phantoms:
-			phantom.render()
+	def __lt__(self, other: SourceBreakpoint):
+		return (self.file, self.line, self.column or 0) < (other.file, other.line, other.column or 0)
 
-	def add_to_view(self, view: sublime.View):
-		for phantom in self.phantoms:
-			if phantom.view.id() == view.id():
-				phantom.render()
-				return
 
-		def show_edit_menu():
-			self.breakpoints.edit(self).run()
+# Renders the breakpoints of a file in the gutter of a view
+# Breakpoints with the same icon share a region key so each icon is updated with one add_regions call no matter how many breakpoints there are
+# The regions stay in the same order when the view is edited so the breakpoints are moved to where their regions are in one pass, see sync
+# Each line also has a hidden region under its own key which is only read when the regions of an icon were merged by deleting the lines between them
+class SourceBreakpointsView:
+	next_id = 0
 
-		self.phantoms.append(SourceBreakpointGutterPhantom(self, view, show_edit_menu))
+	def __init__(self, breakpoints: SourceBreakpoints, view: sublime.View, file: str):
+		SourceBreakpointsView.next_id += 1
+		self.id = SourceBreakpointsView.next_id
 
-	def clear_views(self):
-		for phantom in self.phantoms:
-			phantom.dispose()
-		self.phantoms = []
+		self.breakpoints = breakpoints
+		self.view = view
+		self.file = file
+		self.disposed = False
+		self.render_scheduled = False
 
-	def __lt__(self, other: SourceBreakpoint):
-		return (self.file, self.line, self.column or 0) < (other.file, other.line, other.column or 0)
+		# the change count of the view when the regions were last added or read
+		self.change_count = -1
 
+		# (icon, scope) -> region key
+		self.region_keys: dict[tuple[str, str], str] = {}
+
+		# region key -> the lines that have a region, the breakpoints on each line and the key of the region of that line alone, in the same order as the regions
+		self.regions: dict[str, list[tuple[int, list[SourceBreakpoint], str]]] = {}
+		self.next_line_key = 0
+
+		# breakpoints with a column have a phantom at the column -> ((line, column, icon), phantom)
+		self.column_phantoms: dict[SourceBreakpoint, tuple[tuple[int, int, str], ui.RawPhantom]] = {}
 
-class SourceBreakpointGutterPhantom:
-	def __init__(self, breakpoint: SourceBreakpoint, view: sublime.View, on_click_inline: Callable[[], None]):
-		self.breakpoint = breakpoint
-		self.view = view
-		self.disposed = False
-		self.column_phantom: ui.RawPhantom | None = None
-		self.on_click_inline = on_click_inline
 		self.render()
 
+	def region_key(self, icon: str, scope: str):
+		key = self.region_keys.get((icon, scope))
+		if not key:
+			key = self.region_keys[icon, scope] = f'bp{self.id}.{len(self.region_keys)}'
+		return key
+
+	def line_region_key(self, line: int):
+		self.next_line_key += 1
+		key = f'bp{self.id}.line.{self.next_line_key}'
+		self.view.add_regions(key, [sublime.Region(self.view.text_point(line - 1, 0))], flags=sublime.HIDDEN)
+		return key
+
+	# renders the breakpoints once the view is loaded, any changes before then are rendered at the same time
+	def render(self):
+		if self.render_scheduled:
+			return
+
+		self.render_scheduled = True
+		core.call_soon(self.render_when_loaded)
+
 	@core.run
-	async def render(self):
+	async def render_when_loaded(self):
 		# Occasionally when opening a view it will not be loaded before this stuff is executed (probably depends on how long the os takes loading the file)
-		# If it does happen the breakpoint will not appear until the user activates the view and we refresh breakpoints
 		await core.wait_for_view_to_load(self.view)
+		self.render_scheduled = False
 
 		if self.disposed:
 			return
 
-		self.clear()
-
-		image = self.breakpoint.image
-		line = self.breakpoint.line
-		column = self.breakpoint.column
-
-		line_start_point = self.view.text_point(line - 1, 0)
-		self.view.add_regions(self.breakpoint.region_name, [sublime.Region(line_start_point)], scope=self.breakpoint.scope(), icon=image.file, flags=sublime.HIDDEN)
-
-		if column and self.breakpoint.dap.column:
-			html: str = f'''
-				<body id="debugger">
-					<style>
-						img {{
-							width: 1.25rem;
-							height: 1.25rem;
-						}}
-					</style>
-					<a href="">
-						<img src="{self.breakpoint.image.data()}" />
-					</a>
-
-				</body>
-			'''
-			column_point = self.view.text_point(line - 1, column - 1)
-			self.column_phantom = ui.RawPhantom(self.view, sublime.Region(column_point), html, on_navigate=lambda _: self.on_click_inline())
-
-	def clear(self):
-		self.view.erase_regions(self.breakpoint.region_name)
-		if self.column_phantom:
-			self.column_phantom.dispose()
-			self.column_phantom = None
+		started = time.perf_counter()
+
+		# edits since the regions were added move the breakpoints, they have to be read before the regions are replaced
+		if self.view.change_count() != self.change_count:
+			self.sync()
+
+		# region key -> (icon, scope)
+		styles: dict[str, tuple[str, str]] = {}
+		lines_for_key: dict[str, list[tuple[int, list[SourceBreakpoint]]]] = {}
+		columns: dict[SourceBreakpoint, tuple[int, int, str]] = {}
+
+		for breakpoint in self.breakpoints.breakpoints_for_file(self.file):
+			image = breakpoint.image
+			style = (image.file, breakpoint.scope())
+			key = self.region_key(*style)
+			styles[key] = style
+
+			line = breakpoint.line
+			lines = lines_for_key.setdefault(key, [])
+			if lines and lines[-1][0] == line:
+				lines[-1][1].append(breakpoint)
+			else:
+				lines.append((line, [breakpoint]))
+
+			column = breakpoint.column
+			if column and breakpoint.dap.column:
+				columns[breakpoint] = (line, column, image.file)
+
+		# the regions of lines that already had a region with the same icon are kept, lines moved onto the same line by sync only keep one
+		line_keys: dict[tuple[str, int], str] = {}
+		for key, lines in self.regions.items():
+			for line, _, line_key in lines:
+				if (key, line) in line_keys:
+					self.view.erase_regions(line_key)
+				else:
+					line_keys[key, line] = line_key
+
+		regions: dict[str, list[tuple[int, list[SourceBreakpoint], str]]] = {}
+		for key, lines in lines_for_key.items():
+			regions[key] = [(line, breakpoints, line_keys.pop((key, line), None) or self.line_region_key(line)) for line, breakpoints in lines]
+
+		for line_key in line_keys.values():
+			self.view.erase_regions(line_key)
+
+		updated = 0
+		for key in regions.keys() | self.regions.keys():
+			lines = regions.get(key)
+			previous = self.regions.get(key)
+			if previous and lines and [line for line, _, _ in previous] == [line for line, _, _ in lines]:
+				continue
+
+			updated += 1
+			if lines:
+				icon, scope = styles[key]
+				points = [sublime.Region(self.view.text_point(line - 1, 0)) for line, _, _ in lines]
+				self.view.add_regions(key, points, scope=scope, icon=icon, flags=sublime.HIDDEN)
+			else:
+				self.view.erase_regions(key)
+
+		self.regions = regions
+		self.change_count = self.view.change_count()
+
+		for breakpoint, (location, phantom) in list(self.column_phantoms.items()):
+			if columns.get(breakpoint) != location:
+				phantom.dispose()
+				del self.column_phantoms[breakpoint]
+
+		for breakpoint, location in columns.items():
+			if breakpoint not in self.column_phantoms:
+				self.column_phantoms[breakpoint] = (location, self.column_phantom(breakpoint, location))
+
+		if Settings.development:
+			core.info(f'breakpoints: rendered {len(columns)} columns and {updated} of {len(regions)} region keys in {os.path.basename(self.file)} in {(time.perf_counter() - started) * 1000:.1f}ms')
+
+	def column_phantom(self, breakpoint: SourceBreakpoint, location: tuple[int, int, str]):
+		line, column, _ = location
+		html: str = f'''
+			<body id="debugger">
+				<style>
+					img {{
+						width: 1.25rem;
+						height: 1.25rem;
+					}}
+				</style>
+				<a href="">
+					<img src="{breakpoint.image.data()}" />
+				</a>
+
+			</body>
+		'''
+		column_point = self.view.text_point(line - 1, column - 1)
+		return ui.RawPhantom(self.view, sublime.Region(column_point), html, on_navigate=lambda _: self.breakpoints.edit(breakpoint).run())
+
+	# moves the breakpoints to the lines their regions were moved to by edits
+	# if the number of regions changed the regions of lines were merged when the lines between them were deleted so the region of each line is read on its own instead
+	# this is called while rendering so the moved breakpoints are only reindexed and not rendered again, see SourceBreakpoints.moved
+	def sync(self):
+		self.change_count = self.view.change_count()
+
+		moved_breakpoints: list[SourceBreakpoint] = []
+
+		for key, lines in self.regions.items():
+			regions = self.view.get_regions(key)
+			if len(regions) != len(lines):
+				regions = [self.view.get_regions(line_key)[0] for _, _, line_key in lines]
+
+			for index, (region, (line, breakpoints, line_key)) in enumerate(zip(regions, lines)):
+				moved = self.view.rowcol(region.a)[0] + 1
+				if moved == line:
+					continue
+
+				lines[index] = (moved, breakpoints, line_key)
+				for breakpoint in breakpoints:
+					# removed since the regions were added
+					if breakpoint not in self.breakpoints.indexed_lines:
+						continue
+
+					breakpoint.dap.line += moved - line
+					moved_breakpoints.append(breakpoint)
+
+		if moved_breakpoints:
+			self.breakpoints.moved(self, moved_breakpoints)
 
 	def dispose(self):
-		self.clear()
 		self.disposed = True
+		for key, lines in self.regions.items():
+			self.view.erase_regions(key)
+			for _, _, line_key in lines:
+				self.view.erase_regions(line_key)
+		for _, phantom in self.column_phantoms.values():
+			phantom.dispose()
+
+		self.regions = {}
+		self.column_phantoms = {}
+
+
+# the breakpoints of a file by line, lines is kept sorted so the breakpoints can be listed in order without sorting them
+class SourceBreakpointsFile:
+	def __init__(self):
+		self.lines: list[int] = []
+		self.breakpoints_for_line: dict[int, list[SourceBreakpoint]] = {}
+
+	def __iter__(self):
+		for line in self.lines:
+			yield from self.breakpoints_for_line[line]
+
+	def __bool__(self):
+		return bool(self.lines)
+
+	def on_line(self, line: int) -> list[SourceBreakpoint]:
+		return self.breakpoints_for_line.get(line, [])
+
+	def add(self, breakpoint: SourceBreakpoint, line: int):
+		breakpoints = self.breakpoints_for_line.get(line)
+		if breakpoints is None:
+			bisect.insort(self.lines, line)
+			self.breakpoints_for_line[line] = [breakpoint]
+		else:
+			breakpoints.append(breakpoint)
+			breakpoints.sort(key=lambda b: b.column or 0)
+
+	def remove(self, breakpoint: SourceBreakpoint, line: int):
+		breakpoints = self.breakpoints_for_line[line]
+		breakpoints.remove(breakpoint)
+		if not breakpoints:
+			del self.breakpoints_for_line[line]
+			del self.lines[bisect.bisect_left(self.lines, line)]
 
 
 class SourceBreakpoints:
 	def __init__(self):
-		self.breakpoints: list[SourceBreakpoint] = []
+		# file -> breakpoints by line, file_names is kept sorted so the breakpoints can be listed by file and line
+		self.files: dict[str, SourceBreakpointsFile] = {}
+		self.file_names: list[str] = []
+
+		# the line each breakpoint is indexed at, which is its line the last time it was added or updated
+		self.indexed_lines: dict[SourceBreakpoint, int] = {}
+
 		self.on_updated = core.Event[SourceBreakpoint]()
 		self.on_send = core.Event[SourceBreakpoint]()
 
 		self.sync_dirty_scheduled = False
 		self.dirty_views: dict[int, sublime.View] = {}
 
+		# view id -> the breakpoints rendered in that view
+		self.views: dict[int, SourceBreakpointsView] = {}
+
 	def __iter__(self):
-		return iter(self.breakpoints)
+		for file in self.file_names:
+			yield from self.files[file]
+
+	@property
+	def breakpoints(self) -> list[SourceBreakpoint]:
+		return list(self)
 
 	def into_json(self) -> list[Any]:
 		return list(map(lambda b: b.into_json(), self.breakpoints))
 
 	def load_json(self, json: list[Any]):
-		self.breakpoints = list(map(lambda j: SourceBreakpoint.from_json(self, j), json))
-		self.breakpoints.sort()
+		self.files.clear()
+		self.file_names.clear()
+		self.indexed_lines.clear()
+
+		for j in json:
+			self.index(SourceBreakpoint.from_json(self, j))
+
 		self.add_breakpoints_to_current_view()
 
+	def index(self, breakpoint: SourceBreakpoint):
+		line = breakpoint.line
+		self.indexed_lines[breakpoint] = line
+
+		file = self.files.get(breakpoint.file)
+		if not file:
+			file = self.files[breakpoint.file] = SourceBreakpointsFile()
+			bisect.insort(self.file_names, breakpoint.file)
+		file.add(breakpoint, line)
+
+	def unindex(self, breakpoint: SourceBreakpoint):
+		file = self.files[breakpoint.file]
+		file.remove(breakpoint, self.indexed_lines.pop(breakpoint))
+		if not file:
+			del self.files[breakpoint.file]
+			del self.file_names[bisect.bisect_left(self.file_names, breakpoint.file)]
+
+	# the line of a breakpoint changes when it is moved in the view or when the adapter verifies it at a different line
+	def reindex(self, breakpoint: SourceBreakpoint):
+		line = self.indexed_lines.get(breakpoint)
+		if line is not None and line != breakpoint.line:
+			self.unindex(breakpoint)
+			self.index(breakpoint)
+
 	def clear_breakpoint_result(self, session: Session):
 		for breakpoint in self.breakpoints:
 			if breakpoint.clear_breakpoint_result(session):
@@ -206,14 +404,38 @@ class SourceBreakpoints:
 		self.updated(breakpoint, send=False)
 
 	def updated(self, breakpoint: SourceBreakpoint, send: bool = True):
-		breakpoint.update_views()
+		self.reindex(breakpoint)
+		self.render_views(breakpoint.file)
 		self.on_updated(breakpoint)
 		if send:
 			self.on_send(breakpoint)
 
+	# breakpoints moved by edits in view, view is rendering them already so only the other views of the file are rendered
+	def moved(self, view: SourceBreakpointsView, breakpoints: list[SourceBreakpoint]):
+		for breakpoint in breakpoints:
+			self.reindex(breakpoint)
+
+		self.render_views(view.file, view)
+
+		for breakpoint in breakpoints:
+			self.on_updated(breakpoint)
+
+	def render_views(self, file: str, exclude: SourceBreakpointsView | None = None):
+		for view in self.views.values():
+			if view.file == file and view is not exclude:
+				view.render()
+
+	def on_close(self, view: sublime.View):
+		self.dirty_views.pop(view.id(), None)
+
+		breakpoints_view = self.views.pop(view.id(), None)
+		if breakpoints_view:
+			breakpoints_view.dispose()
+
 	def dispose(self):
-		for bp in self.breakpoints:
-			bp.clear_views()
+		for view in self.views.values():
+			view.dispose()
+		self.views.clear()
 
 	def edit(self, breakpoint: SourceBreakpoint, index=4):
 		def set_log(value: str):
@@ -293,14 +515,12 @@ class SourceBreakpoints:
 
 		ui.InputList('Edit breakpoint')[items].run()
 
-	# todo: fix... this is going to trigger a ton of breakpoint requests if the debugger is active
 	def remove_all(self):
-		while self.breakpoints:
-			self.remove(self.breakpoints[0])
+		for breakpoint in self.breakpoints:
+			self.remove(breakpoint)
 
 	def remove(self, breakpoint: SourceBreakpoint):
-		breakpoint.clear_views()
-		self.breakpoints.remove(breakpoint)
+		self.unindex(breakpoint)
 		self.updated(breakpoint)
 
 	def toggle_enabled(self, breakpoint: SourceBreakpoint):
@@ -315,39 +535,32 @@ class SourceBreakpoints:
 			self.add_breakpoint(file, line, column)
 
 	def breakpoints_for_file(self, file: str) -> list[SourceBreakpoint]:
-		r = list(filter(lambda b: b.file == file, self.breakpoints))
-		return r
+		breakpoints = self.files.get(file)
+		return list(breakpoints) if breakpoints else []
 
 	def breakpoints_per_file(self) -> dict[str, list[SourceBreakpoint]]:
-		bps: dict[str, list[SourceBreakpoint]] = {}
-		for breakpoint in self.breakpoints:
-			if breakpoint.file in bps:
-				bps[breakpoint.file].append(breakpoint)
-			else:
-				bps[breakpoint.file] = [breakpoint]
-		return bps
+		return {file: list(breakpoints) for file, breakpoints in self.files.items()}
 
 	def get_breakpoint(self, file: str, line: int, column: int | None = None):
-		for b in self.breakpoints:
-			if b.file == file and b.line == line and b.column == column:
+		for b in self.get_breakpoints_on_line(file, line):
+			if b.column == column:
 				return b
 		return None
 
 	def get_breakpoints_on_line(self, file: str, line: int) -> list[SourceBreakpoint]:
-		r = list(filter(lambda b: b.file == file and b.line == line, self.breakpoints))
-		return r
+		breakpoints = self.files.get(file)
+		return list(breakpoints.on_line(line)) if breakpoints else []
 
 	def add_breakpoint(self, file: str, line: int, column: int | None = None):
 		# ensure we don't add a breakpoint that is at the same location
 		# note: compare to the uderlying dap module since breakpoint.line/column reflect the actual location of the breakpoint
 		# after it has been verified
-		for breakpoint in self.breakpoints:
-			if breakpoint.file == file and breakpoint.dap.line == line and breakpoint.dap.column == column:
+		for breakpoint in self.files.get(file) or ():
+			if breakpoint.dap.line == line and breakpoint.dap.column == column:
 				return
 
 		breakpoint = SourceBreakpoint(self, file, line, column, True)
-		self.breakpoints.append(breakpoint)
-		self.breakpoints.sort()
+		self.index(breakpoint)
 		self.updated(breakpoint)
 		self.add_breakpoints_to_current_view()
 		return breakpoint
@@ -371,31 +584,30 @@ class SourceBreakpoints:
 		self.sync_dirty_scheduled = False
 		for view in self.dirty_views.values():
 			self.sync_from_view(view)
+		self.dirty_views.clear()
 
 	# changes the data model to match up with the view regions
 	# adds any breakpoints found in the data model that are not found on the view
 	def sync_from_view(self, view: sublime.View):
-		file = view.file_name()
-		if not file:
+		breakpoints_view = self.views.get(view.id())
+		if not breakpoints_view or breakpoints_view.file != view.file_name():
+			self.sync_from_breakpoints(view)
 			return
 
-		for b in self.breakpoints:
-			if b.file != file:
-				continue
-			identifier = b.region_name
-			regions = view.get_regions(identifier)
-			if len(regions) == 0:
-				b.add_to_view(view)
-			else:
-				line = view.rowcol(regions[0].a)[0] + 1
-				if line != b.line:
-					b.dap.line = line
-					self.updated(b, send=False)
+		breakpoints_view.sync()
+		breakpoints_view.render()
 
 	# moves the view regions to match up with the data model
 	def sync_from_breakpoints(self, view: sublime.View):
 		file = view.file_name()
-		for breakpoint in self.breakpoints:
-			if breakpoint.file != file:
-				continue
-			breakpoint.add_to_view(view)
+		breakpoints_view = self.views.get(view.id())
+		if breakpoints_view and breakpoints_view.file == file:
+			breakpoints_view.render()
+			return
+
+		if breakpoints_view:
+			breakpoints_view.dispose()
+			del self.views[view.id()]
+
+		if file:
+			self.views[view.id()] = SourceBreakpointsView(self, view, file)
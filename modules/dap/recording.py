@@ -0,0 +1,69 @@
+'''
+	Recordings of the messages exchanged with a debug adapter
+
+	Each message is a header line `<seconds since the start> <direction> <length>` followed by the message and a newline.
+	The direction is `->` for messages from the adapter and `<-` for messages sent to the adapter, the same as the protocol window uses. Recordings are gzip compressed.
+'''
+from __future__ import annotations
+from typing import Any
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from .. import core
+
+
+@dataclass
+class TransportRecord:
+	time: float
+	incoming: bool
+	content: str
+
+
+class TransportRecorder:
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self.file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+		self.lock = threading.Lock()
+		self.start = time.perf_counter()
+
+	@staticmethod
+	def create(directory: str, name: str) -> TransportRecorder:
+		os.makedirs(directory, exist_ok=True)
+		name = re.sub(r'[^\w\-]+', '_', name)
+		return TransportRecorder(os.path.join(directory, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}.dap.gz'))
+
+	# called from both the reader and writer threads
+	def record(self, incoming: bool, content: str):
+		with self.lock:
+			if self.file.closed:
+				return
+
+			self.file.write(f'{time.perf_counter() - self.start:.6f} {"->" if incoming else "<-"} {len(content)}\n{content}\n')
+
+	def close(self):
+		with self.lock:
+			self.file.close()
+
+
+def read_recording(path: str) -> list[TransportRecord]:
+	records: list[TransportRecord] = []
+
+	with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+		while header := file.readline():
+			timestamp, direction, length = header.split()
+			content = file.read(int(length))
+			file.readline()
+
+			records.append(TransportRecord(float(timestamp), direction == '->', content))
+
+	return records
+
+
+def decode_record(record: TransportRecord) -> dict[str, Any]:
+	return json.loads(record.content)
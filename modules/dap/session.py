@@ -1,7 +1,11 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Awaitable, Callable, cast
 from enum import IntEnum
+from collections import Counter, deque
+import time
+
 from .. import core
+from ..settings import Settings
 from . import api
 from .debugger import ConsoleSessionBound, Debugger
 from .error import Error
@@ -63,6 +67,15 @@ class Session(TransportListener, core.Dispose):
 		self.breakpoints = debugger.breakpoints
 		self.breakpoints_for_id: dict[int, Breakpoint] = {}
 
+		# breakpoint kinds ('filters', 'function', 'data') and files with changes that have not been sent yet, see schedule_breakpoints
+		self.breakpoints_dirty: set[str] = set()
+		self.breakpoints_dirty_files: set[str] = set()
+		self.breakpoints_scheduled = False
+
+		# command or file -> (arguments, breakpoints) of the last set*Breakpoints request sent and the last one the adapter acknowledged, see request_breakpoints
+		self.breakpoints_sending: dict[str, tuple[str, list[Any]]] = {}
+		self.breakpoints_sent: dict[str, tuple[str, list[Any]]] = {}
+
 		self.dispose_add(
 			self.breakpoints.data.on_send.add(self.on_send_data_breakpoints),
 			self.breakpoints.function.on_send.add(self.on_send_function_breakpoints),
@@ -73,6 +86,23 @@ class Session(TransportListener, core.Dispose):
 		self._transport_started = False
 		self._transport: Transport | None = None
 
+		# requests waiting for a response -> (command, time sent)
+		self.requests_in_flight: dict[core.Future[Any], tuple[str, float]] = {}
+		self.requests_sent = 0
+		self.requests_timed_out = 0
+
+		# (areas, requests sent before, requests sent after) for the last invalidated event, see refresh_invalidated
+		self.invalidated_requests: tuple[list[str], int, int] | None = None
+		self.requests_cancelled = 0
+
+		# coalesced requests by command and arguments -> (command, arguments, request), see request
+		self.request_cache: dict[str, tuple[str, Any, core.Future[Any]]] = {}
+		self.request_cache_hits = 0
+		self.request_cache_misses = 0
+
+		# hover and watch evaluations for the selected frame, these are cancelled when a different frame is selected
+		self.frame_requests: list[core.Future[Any]] = []
+
 		self.launching_async: core.Future | None = None
 		self.capabilities = api.Capabilities()
 		self.stop_requested = False
@@ -87,6 +117,16 @@ class Session(TransportListener, core.Dispose):
 		self.disposeables: list[Any] = []
 
 		self.threads_for_id: dict[int, Thread] = {}
+		self.threads_refresh: core.Future[list[Thread]] | None = None
+		self.threads_refresh_update = False
+		self.threads_refresh_in_flight = False
+		self.stop_count = 0
+
+		# paths of the variables that are expanded in the ui, see prefetch_variables
+		self.expanded_variable_paths: set[tuple[str, ...]] = set()
+
+		# function name -> (stop count, value for each path, values from the stop before), see mark_changed_variables
+		self.variable_values: dict[str, tuple[int, dict[tuple[str, ...], str | None], dict[tuple[str, ...], str | None]]] = {}
 		self.all_threads_stopped = False
 		self.selected_explicitly = False
 		self.selected_thread = None
@@ -97,6 +137,11 @@ class Session(TransportListener, core.Dispose):
 		self.sources: dict[int | str, api.Source] = {}
 		self.modules: dict[int | str, api.Module] = {}
 
+		# module and loaded source events that have not been applied yet, id -> the new module or source or None if it was removed, see schedule_changes
+		self.modules_changed: dict[int | str, api.Module | None] = {}
+		self.sources_changed: dict[int | str, api.Source | None] = {}
+		self.changes_scheduled = False
+
 		self.process: api.ProcessEvent | None = None
 
 	@property
@@ -151,8 +196,8 @@ class Session(TransportListener, core.Dispose):
 
 	@core.run
 	async def _launch(self) -> None:
-		assert self.state == Session.State.STOPPED, 'debugger not in stopped state?'
-		self._change_state(Session.State.STARTING)
+		# sessions are created in the starting state, launch already makes sure they are only launched once
+		assert self.state == Session.State.STARTING, 'debugger not in starting state?'
 		self.configuration = await self.adapter.configuration_resolve(self.configuration)
 
 		installed_version = self.adapter.installed_version
@@ -187,7 +232,7 @@ class Session(TransportListener, core.Dispose):
 				'linesStartAt1': True,
 				'columnsStartAt1': True,
 				'supportsVariableType': True,
-				'supportsVariablePaging': False,
+				'supportsVariablePaging': True,
 				'supportsRunInTerminalRequest': True,
 				'supportsMemoryReferences': True,
 				'supportsInvalidatedEvent': True,
@@ -224,14 +269,111 @@ class Session(TransportListener, core.Dispose):
 		self._change_state_status('Running')
 		self._change_state(Session.State.RUNNING)
 
+	# responses to these do not change until the debuggee runs again or the adapter invalidates them so identical requests can share one response
+	coalesced_commands = {'variables', 'scopes', 'stackTrace', 'exceptionInfo', 'source'}
+
 	async def request(self, command: str, arguments: Any) -> Any:
+		if command not in Session.coalesced_commands:
+			return await self._request(command, arguments)
+
+		key = command + core.json_encode(arguments)
+		if cached := self.request_cache.get(key):
+			self.request_cache_hits += 1
+			request = cached[2]
+		else:
+			self.request_cache_misses += 1
+			request = core.run(self._request(command, arguments))
+			self.request_cache[key] = (command, arguments, request)
+
+			# failed requests are not cached so they can be retried
+			def done(request: core.Future[Any]):
+				cached = self.request_cache.get(key)
+				if (request.cancelled() or request.exception()) and cached and cached[2] is request:
+					del self.request_cache[key]
+
+			request.add_done_callback(done)
+
+		# one caller being cancelled must not cancel the request for everyone else sharing it
+		return await core.shield(request)
+
+	# called when the debuggee runs again or the adapter invalidates its state
+	# commands/matches only remove the responses to those commands whose arguments match
+	def clear_request_cache(self, commands: set[str] | None = None, matches: Callable[[Any], bool] | None = None):
+		if commands is None and matches is None:
+			self.request_cache.clear()
+			return
+
+		for key, (command, arguments, _) in list(self.request_cache.items()):
+			if (commands is None or command in commands) and (matches is None or matches(arguments)):
+				del self.request_cache[key]
+
+	async def _request(self, command: str, arguments: Any) -> Any:
 		if not self._transport_started:
 			raise Error('Debugging not started')
 
 		if not self._transport:
 			raise Error('Debugging ended')
 
-		return await self._transport.send_request(command, arguments)
+		transport = self._transport
+		request: core.Future[Any] = core.run(transport.send_request(command, arguments))
+		self.requests_in_flight[request] = (command, time.perf_counter())
+		self.requests_sent += 1
+
+		timed_out = False
+
+		# expressions typed into the console can take as long as the user wants them to
+		if command == 'evaluate' and arguments and arguments.get('context') == 'repl':
+			timeout = None
+		else:
+			timeout = Settings.request_timeouts.get(command)
+
+		def on_timeout():
+			nonlocal timed_out
+			timed_out = True
+			request.cancel()
+
+		timer = core.call_later(timeout, on_timeout) if timeout else None
+
+		try:
+			return await request
+
+		except core.CancelledError:
+			self.cancel_request(transport, request)
+
+			if timed_out:
+				self.requests_timed_out += 1
+				raise Error(f'{command} timed out after {timeout} seconds')
+
+			self.requests_cancelled += 1
+			raise
+
+		finally:
+			del self.requests_in_flight[request]
+			if timer:
+				timer.cancel()
+
+	# tells the adapter the response to this request is no longer needed if it supports cancelling requests
+	def cancel_request(self, transport: Transport, request: core.Future[Any]):
+		seq = transport.cancel_request(request)
+		if seq is None or not self.capabilities.supportsCancelRequest or transport is not self._transport:
+			return
+
+		core.run(self.request('cancel', {'requestId': seq}), on_error=lambda e: core.debug('cancel request failed', e))
+
+	def request_stats(self) -> str:
+		cache = f'{self.request_cache_hits} coalesced, {self.request_cache_misses} sent'
+		if self.invalidated_requests:
+			areas, before, after = self.invalidated_requests
+			cache += f', {after - before} sent for the last invalidated event ({", ".join(areas)})'
+		if not self.requests_in_flight:
+			return f'{self.name}: no requests in flight, {self.requests_cancelled} cancelled, {self.requests_timed_out} timed out, {cache}'
+
+		now = time.perf_counter()
+		commands = Counter(command for command, _ in self.requests_in_flight.values())
+		oldest_command, oldest_time = min(self.requests_in_flight.values(), key=lambda request: request[1])
+
+		in_flight = ', '.join(f'{command}: {count}' for command, count in commands.most_common())
+		return f'{self.name}: {len(self.requests_in_flight)} requests in flight ({in_flight}), oldest {oldest_command} sent {now - oldest_time:.1f}s ago, {self.requests_cancelled} cancelled, {self.requests_timed_out} timed out, {cache}'
 
 	async def run_pre_debug_task(self) -> bool:
 		pre_debug_command = self.configuration.pre_debug_task
@@ -309,7 +451,7 @@ class Session(TransportListener, core.Dispose):
 						)
 					)
 
-			await self.request('setExceptionBreakpoints', {'filters': filters, 'filterOptions': filterOptions})
+			await self.request_breakpoints('setExceptionBreakpoints', {'filters': filters, 'filterOptions': filterOptions}, [])
 		except Error as e:
 			self.console.error('Error while exception filters: {}'.format(e))
 
@@ -327,7 +469,10 @@ class Session(TransportListener, core.Dispose):
 		try:
 			dap_breakpoints = list(map(lambda b: b.dap, breakpoints))
 
-			response = await self.request('setFunctionBreakpoints', {'breakpoints': dap_breakpoints})
+			response = await self.request_breakpoints('setFunctionBreakpoints', {'breakpoints': dap_breakpoints}, breakpoints)
+			if response is None:
+				return
+
 			results: list[api.Breakpoint] = response['breakpoints']
 
 			for result, b in zip(results, breakpoints):
@@ -345,7 +490,10 @@ class Session(TransportListener, core.Dispose):
 		dap_breakpoints = list(map(lambda b: b.dap, breakpoints))
 
 		try:
-			response = await self.request('setDataBreakpoints', {'breakpoints': dap_breakpoints})
+			response = await self.request_breakpoints('setDataBreakpoints', {'breakpoints': dap_breakpoints}, breakpoints)
+			if response is None:
+				return
+
 			results: list[api.Breakpoint] = response['breakpoints']
 			for result, b in zip(results, breakpoints):
 				self.breakpoints.data.set_breakpoint_result(b, self, result)
@@ -380,14 +528,19 @@ class Session(TransportListener, core.Dispose):
 				lines.append(breakpoint.dap.line)
 
 		try:
-			response = await self.request(
+			response = await self.request_breakpoints(
 				'setBreakpoints',
 				{
 					'source': {'path': file},
 					'breakpoints': dap_breakpoints,
 					'lines': lines,  # for backwards compat
 				},
+				enabled_breakpoints,
+				key=file,
 			)
+			if response is None:
+				return
+
 			results: list[dap.Breakpoint] = response['breakpoints']
 
 			if len(results) != len(enabled_breakpoints):
@@ -403,17 +556,81 @@ class Session(TransportListener, core.Dispose):
 			for b in enabled_breakpoints:
 				self.breakpoints.source.set_breakpoint_result(b, self, api.Breakpoint(verified=False, message=str(e)))
 
+	# Returns None without sending anything if the arguments are the same as the last ones the adapter acknowledged for the same breakpoints and nothing else was sent since
+	# Identical arguments are sent again while the first request is in flight since that request might still fail
+	# key: defaults to the command, source breakpoints are sent for each file
+	async def request_breakpoints(self, command: str, arguments: Any, breakpoints: list[Any], key: str | None = None) -> Any | None:
+		key = key or command
+		encoded = core.json_encode(arguments)
+
+		sent = self.breakpoints_sent.get(key)
+		if sent and self.breakpoints_sending.get(key) is sent and sent[0] == encoded and len(sent[1]) == len(breakpoints) and all(a is b for a, b in zip(sent[1], breakpoints)):
+			return None
+
+		sending = (encoded, breakpoints)
+		self.breakpoints_sending[key] = sending
+
+		try:
+			response = await self.request(command, arguments)
+		except BaseException:
+			# the adapter might have any of the breakpoints now so the next request for this key is always sent
+			if self.breakpoints_sending.get(key) is sending:
+				del self.breakpoints_sending[key]
+				self.breakpoints_sent.pop(key, None)
+			raise
+
+		# a newer request for the same key replaces these breakpoints once it is acknowledged
+		if self.breakpoints_sending.get(key) is sending:
+			self.breakpoints_sent[key] = sending
+
+		return response
+
 	def on_send_data_breakpoints(self, any: Any):
-		core.run(self.set_data_breakpoints())
+		self.schedule_breakpoints('data')
 
 	def on_send_function_breakpoints(self, any: Any):
-		core.run(self.set_function_breakpoints())
+		self.schedule_breakpoints('function')
 
 	def on_send_filters(self, any: Any):
-		core.run(self.set_exception_breakpoint_filters())
+		self.schedule_breakpoints('filters')
 
 	def on_send_source_breakpoint(self, breakpoint: SourceBreakpoint) -> None:
-		core.run(self.set_breakpoints_for_file(breakpoint.file, self.breakpoints.source.breakpoints_for_file(breakpoint.file)))
+		self.schedule_breakpoints('source', breakpoint.file)
+
+	# Changes are collected and sent at the end of the main loop iteration so changing many breakpoints at once sends at most one request for each kind and file
+	# Every session schedules its own requests so they are sent to all of the sessions at the same time
+	def schedule_breakpoints(self, kind: str, file: str | None = None):
+		if file:
+			self.breakpoints_dirty_files.add(file)
+		else:
+			self.breakpoints_dirty.add(kind)
+
+		if not self.breakpoints_scheduled:
+			self.breakpoints_scheduled = True
+			core.call_soon(self.send_dirty_breakpoints)
+
+	@core.run
+	async def send_dirty_breakpoints(self):
+		self.breakpoints_scheduled = False
+
+		dirty = self.breakpoints_dirty
+		dirty_files = self.breakpoints_dirty_files
+		self.breakpoints_dirty = set()
+		self.breakpoints_dirty_files = set()
+
+		requests: list[Awaitable[Any]] = []
+
+		if 'filters' in dirty:
+			requests.append(self.set_exception_breakpoint_filters())
+		if 'function' in dirty:
+			requests.append(self.set_function_breakpoints())
+		if 'data' in dirty:
+			requests.append(self.set_data_breakpoints())
+
+		for file in dirty_files:
+			requests.append(self.set_breakpoints_for_file(file, self.breakpoints.source.breakpoints_for_file(file)))
+
+		await core.gather_results(*requests)
 
 	async def stop(self):
 		# this seems to be what the spec says to do in the overview
@@ -439,6 +656,10 @@ class Session(TransportListener, core.Dispose):
 				await self.stop_session()
 				return
 			except Error as e:
+				# the adapter can send the terminated event and close before responding to the terminate request
+				if self.state == Session.State.STOPPING or self.state == Session.State.STOPPED:
+					return
+
 				core.exception()
 
 		# we couldn't terminate either not a launch request or the terminate request failed
@@ -576,14 +797,25 @@ class Session(TransportListener, core.Dispose):
 		if self.selected_frame:
 			frameId = self.selected_frame.id
 
-		response = await self.request(
+		request: core.Future[api.EvaluateResponse] = core.run(self.request(
 			'evaluate',
 			{
 				'expression': expression,
 				'context': context,
 				'frameId': frameId,
 			},
-		)
+		))
+
+		# the result of these is only wanted while this frame is selected
+		if context == 'hover' or context == 'watch':
+			self.frame_requests.append(request)
+			request.add_done_callback(self.frame_requests.remove)
+
+		# expressions from the console can have side effects
+		elif context == 'repl':
+			self.clear_request_cache()
+
+		response = await request
 
 		# the spec doesn't say this is optional? But it seems that some implementations throw errors instead of marking things as not verified?
 		if response['result'] is None:
@@ -615,14 +847,16 @@ class Session(TransportListener, core.Dispose):
 			},
 		)
 
-	async def stack_trace(self, thread_id: int) -> list[api.StackFrame]:
-		body = await self.request(
-			'stackTrace',
-			{
-				'threadId': thread_id,
-			},
-		)
-		return body['stackFrames']
+	# levels of 0 requests every frame
+	async def stack_trace(self, thread_id: int, start_frame: int = 0, levels: int = 0) -> api.StackTraceResponse:
+		arguments: dict[str, Any] = {
+			'threadId': thread_id,
+		}
+		if levels:
+			arguments['startFrame'] = start_frame
+			arguments['levels'] = levels
+
+		return await self.request('stackTrace', arguments)
 
 	async def completions(self, text: str, column: int) -> list[api.CompletionItem]:
 		frameId = None
@@ -640,6 +874,9 @@ class Session(TransportListener, core.Dispose):
 		return response['targets']
 
 	async def set_variable(self, variablesReference: int, name: str, value: str) -> api.SetVariableResponse:
+		# changing a variable can change any other variable
+		self.clear_request_cache()
+
 		return await self.request(
 			'setVariable',
 			{
@@ -660,27 +897,105 @@ class Session(TransportListener, core.Dispose):
 		return response
 
 	async def refresh_scopes(self, frame: api.StackFrame):
+		variables = await self.fetch_scopes(frame)
+
+		# a different frame was selected while these were loading
+		if frame is not self.selected_frame:
+			return
+
+		self.variables = variables
+		self.on_updated_variables(self)
+
+	# fetches the scopes of a frame and prefetches the variables that are going to be shown so they can be shown all at once
+	async def fetch_scopes(self, frame: api.StackFrame) -> list[Variable]:
 		body = await self.request('scopes', {'frameId': frame.id})
 		scopes: list[api.Scope] = body['scopes']
-		self.variables = [Variable.from_scope(self, scope) for scope in scopes]
-		self.on_updated_variables(self)
+		variables = [Variable.from_scope(self, scope) for scope in scopes]
+		await self.prefetch_variables(variables)
+		self.mark_changed_variables(frame, variables)
+		return variables
+
+	# maximum number of variables requests prefetch_variables has in flight at once
+	prefetch_concurrency = 8
+
+	# fetches the children of scopes that are not expensive and of every variable that was expanded the last time it was shown
+	# any errors are left in the variables for the views to show
+	async def prefetch_variables(self, scopes: list[Variable]):
+		fetching = 0
+		waiting: deque[core.Future[None]] = deque()
+
+		async def prefetch(variable: Variable):
+			nonlocal fetching
+			while fetching >= Session.prefetch_concurrency:
+				slot = core.Future()
+				waiting.append(slot)
+				await slot
+
+			fetching += 1
+			try:
+				children = await variable.children()
+			finally:
+				fetching -= 1
+				if waiting:
+					waiting.popleft().set_result(None)
+
+			await core.gather_results(*(prefetch(child) for child in children if child.has_children and child.path in self.expanded_variable_paths))
+
+		await core.gather_results(*(prefetch(scope) for scope in scopes if scope.has_children and (not scope.expensive or scope.path in self.expanded_variable_paths)))
+
+	# number of functions mark_changed_variables remembers values for
+	changed_variables_limit = 16
+
+	# marks the fetched variables whose value changed since the previous stop in the same function
+	def mark_changed_variables(self, frame: api.StackFrame, scopes: list[Variable]):
+		stop_count, values, previous = self.variable_values.pop(frame.name, (-1, {}, {}))
+
+		# selecting the same function again in the same stop compares against the same previous stop
+		if stop_count != self.stop_count:
+			previous = values
+
+		values = {}
+
+		def mark(variables: list[Variable]):
+			for variable in variables:
+				path = variable.path
+				value = variable.value
+				values[path] = value
+				variable.changed = path in previous and previous[path] != value
+				mark(variable.children_fetched)
+
+		mark(scopes)
+
+		self.variable_values[frame.name] = (self.stop_count, values, previous)
+		if len(self.variable_values) > Session.changed_variables_limit:
+			del self.variable_values[next(iter(self.variable_values))]
 
 	async def get_source(self, source: api.Source) -> tuple[str, str | None]:
 		body = await self.request('source', {'source': {'path': source.path, 'sourceReference': source.sourceReference}, 'sourceReference': source.sourceReference})
 		return body['content'], body.get('mimeType')
 
-	async def get_variables(self, variablesReference: int, without_names: bool = False) -> list[Variable]:
-		response = await self.request('variables', {'variablesReference': variablesReference})
+	# filter/start/count request a page of the children, see Variable.fetch
+	async def get_variables(self, variablesReference: int, without_names: bool = False, filter: str | None = None, start: int | None = None, count: int | None = None) -> list[Variable]:
+		arguments: dict[str, Any] = {'variablesReference': variablesReference}
+		if filter:
+			arguments['filter'] = filter
+		if start is not None:
+			arguments['start'] = start
+		if count is not None:
+			arguments['count'] = count
 
-		variables: list[api.Variable] = response['variables']
+		response = await self.request('variables', arguments)
+
+		variables = [Variable.from_variable(self, variablesReference, v) for v in response['variables']]
 
 		# vscode seems to remove the names from variables in output events
+		# the response is shared with other requests for the same variables so only the Variable objects are changed
 		if without_names:
 			for v in variables:
 				v.name = ''
-				v.value = v.value.split('\n')[0]
+				v.value = (v.value or '').split('\n')[0]
 
-		return [Variable.from_variable(self, variablesReference, v) for v in variables]
+		return variables
 
 	def on_breakpoint_event(self, event: api.BreakpointEvent):
 		assert event.breakpoint.id
@@ -690,18 +1005,8 @@ class Session(TransportListener, core.Dispose):
 			core.debug(f'Breakpoint for id not found {event.breakpoint.id}')
 
 	def on_module_event(self, event: api.ModuleEvent):
-		if event.reason == 'new':
-			self.modules[event.module.id] = event.module
-
-		if event.reason == 'removed':
-			try:
-				del self.modules[event.module.id]
-			except KeyError:
-				...
-		if event.reason == 'changed':
-			self.modules[event.module.id] = event.module
-
-		self.on_updated_modules(self)
+		self.modules_changed[event.module.id] = None if event.reason == 'removed' else event.module
+		self.schedule_changes()
 
 	def on_process_event(self, event: api.ProcessEvent):
 		self.process = event
@@ -709,18 +1014,43 @@ class Session(TransportListener, core.Dispose):
 
 	def on_loaded_source_event(self, event: api.LoadedSourceEvent):
 		id = f'{event.source.name}~{event.source.path}~{event.source.sourceReference}'
-		if event.reason == 'new':
-			self.sources[id] = event.source
+		self.sources_changed[id] = None if event.reason == 'removed' else event.source
+		self.schedule_changes()
 
-		elif event.reason == 'removed':
-			try:
-				del self.sources[id]
-			except KeyError:
-				...
-		elif event.reason == 'changed':
-			self.sources[id] = event.source
+	# adapters can send thousands of module and loaded source events at once so they are applied and announced once per main loop iteration
+	def schedule_changes(self):
+		if self.changes_scheduled:
+			return
+
+		self.changes_scheduled = True
+		core.call_soon(self.apply_changes)
+
+	def apply_changes(self):
+		self.changes_scheduled = False
 
-		self.on_updated_sources(self)
+		if self.modules_changed:
+			modules_changed = self.modules_changed
+			self.modules_changed = {}
+
+			for id, module in modules_changed.items():
+				if module:
+					self.modules[id] = module
+				else:
+					self.modules.pop(id, None)
+
+			self.on_updated_modules(self)
+
+		if self.sources_changed:
+			sources_changed = self.sources_changed
+			self.sources_changed = {}
+
+			for id, source in sources_changed.items():
+				if source:
+					self.sources[id] = source
+				else:
+					self.sources.pop(id, None)
+
+			self.on_updated_sources(self)
 
 	# this is a bit of a weird case. Initialized will happen at some point in time
 	# it depends on when the debug adapter chooses it is ready for configuration information
@@ -796,28 +1126,95 @@ class Session(TransportListener, core.Dispose):
 	# after a successfull launch/attach, stopped event, thread event we request all threads
 	# see https://microsoft.github.io/debug-adapter-protocol/overview
 	# updates all the threads from the dap model
-	# @NOTE threads_for_id will retain all threads for the entire session even if they are removed
+	def refresh_threads(self):
+		self.schedule_threads_refresh(update=True)
+
+	# Returns the threads from a threads request sent after this was called
+	# Requests are merged so there is at most one threads request in flight and one waiting to be sent when it finishes, everything asking for threads while a request is waiting shares its response
+	# update: set self.threads and call on_updated_threads when the response arrives
+	def schedule_threads_refresh(self, update: bool = False) -> core.Future[list[Thread]]:
+		if update:
+			self.threads_refresh_update = True
+
+		refresh = self.threads_refresh
+		if not refresh:
+			refresh = self.threads_refresh = core.Future()
+
+		if not self.threads_refresh_in_flight:
+			self.threads_refresh_in_flight = True
+			self.send_threads_refresh()
+
+		return refresh
+
 	@core.run
-	async def refresh_threads(self):
+	async def send_threads_refresh(self):
+		try:
+			while refresh := self.threads_refresh:
+				update = self.threads_refresh_update
+				self.threads_refresh = None
+				self.threads_refresh_update = False
+
+				try:
+					threads = await self.fetch_threads()
+				except core.CancelledError:
+					refresh.cancel()
+					raise
+				except Exception as e:
+					refresh.set_exception(e)
+					continue
+
+				if update:
+					self.set_threads(threads)
+					self.on_updated_threads(self)
+
+				refresh.set_result(threads)
+
+		finally:
+			self.threads_refresh_in_flight = False
+
+	# threads the adapter no longer reports stay in threads_for_id until there are more than this many of them, the ones seen longest ago are removed first
+	threads_retained_limit = 256
+
+	def set_threads(self, threads: list[Thread]):
+		self.threads = threads
+
+		# threads_for_id is kept in the order threads were last seen in
+		for thread in threads:
+			self.threads_for_id[thread.id] = self.threads_for_id.pop(thread.id, thread)
+
+		removable = len(self.threads_for_id) - len(threads) - Session.threads_retained_limit
+		if removable <= 0:
+			return
+
+		keep = {thread.id for thread in threads}
+		if self.selected_thread:
+			keep.add(self.selected_thread.id)
+
+		for id in [id for id in self.threads_for_id if id not in keep][:removable]:
+			del self.threads_for_id[id]
+
+	async def fetch_threads(self) -> list[Thread]:
 		# the Java debugger requires an empty object instead of `None`
 		# See https://github.com/daveleroy/sublime_debugger/pull/106#issuecomment-793802989
 		response = await self.request('threads', {})
 		# See https://github.com/daveleroy/sublime_debugger/pull/106#issuecomment-795949070
 		threads: list[dap.Thread] = response.get('threads', [])
 
-		self.threads.clear()
+		result: list[Thread] = []
 		for thread in threads:
 			t = self.get_thread(thread.id)
 			t.name = thread.name
-			self.threads.append(t)
+			result.append(t)
 
-		self.on_updated_threads(self)
+		return result
 
 	def on_threads_event(self, event: api.ThreadEvent) -> None:
 		self.refresh_threads()
 
 	def on_stopped_event(self, stopped: api.StoppedEvent):
+		self.clear_request_cache()
 		self.stepping_hit_stopped_event = True
+		self.stop_count += 1
 
 		if stopped.allThreadsStopped or False:
 			self.all_threads_stopped = True
@@ -832,38 +1229,60 @@ class Session(TransportListener, core.Dispose):
 		else:
 			stopped_thread_id = None
 
+		thread: Thread | None = None
+
 		if stopped_thread_id is not None:
 			thread = self.get_thread(stopped_thread_id)
 
 			# @NOTE this thread might be new and not in self.threads so we must update its state explicitly
 			thread.set_stopped(stopped)
 
-			if not self.selected_explicitly:
+			if self.selected_explicitly:
+				thread = None
+			else:
+				# commands sent before the stop is shown should go to the stopped thread and not to a frame of the previously selected thread
 				self.select(thread, None, explicitly=False)
-				self.expand_thread(thread)
 
-		self.on_updated_threads(self)
-		self.refresh_threads()
+		self.refresh_stopped(thread)
 		self._refresh_state()
 
+	# Everything a stop shows is requested as soon as it can be and shown in one update
+	# The threads and the stack of the stopped thread are requested together. Once the top frame is known its scopes and the variables that will be shown are requested, see fetch_scopes
 	@core.run
-	async def expand_thread(self, thread: Thread):
-		children = await thread.children()
-		if children and not self.selected_frame and not self.selected_explicitly and self.selected_thread is thread:
+	async def refresh_stopped(self, thread: Thread | None):
+		stop_count = self.stop_count
+		threads = self.schedule_threads_refresh()
 
-			def first_non_subtle_frame(frames: list[api.StackFrame]):
-				for frame in frames:
-					if frame.presentationHint != 'subtle' and frame.source:
-						return frame
-				return frames[0]
+		frame: api.StackFrame | None = None
+		variables: list[Variable] | None = None
 
-			frame = first_non_subtle_frame(children)
-			self.select(thread, frame, explicitly=False)
+		if thread:
+			try:
+				frames = await thread.children()
+				frame = first_non_subtle_frame(frames)
+				if frame:
+					variables = await self.fetch_scopes(frame)
+			except Error:
+				core.exception()
+
+		try:
+			self.set_threads(await threads)
+		except Error:
+			core.exception()
+
+		# stopped again or continued while this was loading
+		if stop_count != self.stop_count:
+			return
 
-			self.on_updated_threads(self)
-			self._refresh_state()
+		if thread and thread.stopped and not self.selected_explicitly:
+			self.select(thread, frame, explicitly=False, variables=variables)
+
+		self.on_updated_threads(self)
+		self._refresh_state()
 
 	def on_continued_event(self, continued: api.ContinuedEvent):
+		self.clear_request_cache()
+
 		# if we hit a stopped event while stepping then the next continue event that is not a stepping event sets stepping to false
 		if self.stepping_hit_stopped_event:
 			self.stepping = False
@@ -883,52 +1302,126 @@ class Session(TransportListener, core.Dispose):
 		self.on_updated_threads(self)
 		self._refresh_state()
 
-	def select(self, thread: Thread | None, frame: api.StackFrame | None, explicitly: bool):
+	# variables are the prefetched scopes for the frame, if they are not provided they are fetched
+	def select(self, thread: Thread | None, frame: api.StackFrame | None, explicitly: bool, variables: list[Variable] | None = None):
 		if frame and not thread:
 			raise Error('Expected thread')
 
+		if frame != self.selected_frame or thread is not self.selected_thread:
+			for request in self.frame_requests:
+				request.cancel()
+
 		self.selected_explicitly = explicitly
 		self.selected_thread = thread
 		self.selected_frame = frame
 		self.on_updated_thread_or_frame(self)
 
-		if frame:
+		if variables is not None:
+			self.variables = variables
+			self.on_updated_variables(self)
+		elif frame:
 			core.run(self.refresh_scopes(frame))
 		else:
 			self.variables.clear()
 			self.on_updated_variables(self)
 
+	# the areas refresh_invalidated refreshes on its own, 'all' or any area not in here refreshes all of them
+	invalidated_areas = {'threads', 'stacks', 'variables'}
+
 	def on_invalidated_event(self, invalidated: api.InvalidatedEvent):
-		areas = invalidated.areas or []
-
-		# 'all' | 'stacks' | 'threads' | 'variables'
-		invalidate_all = bool(areas)
-		invalidate_threads = False
-		invalidate_variables = False
-		invalidate_stacks = False
-
-		for area in areas:
-			if area == 'stacks':
-				invalidate_stacks = True
-			elif area == 'threads':
-				invalidate_threads = True
-			elif area == 'variables':
-				invalidate_stacks = True
+		areas = set(invalidated.areas or ['all'])
+		if not areas <= Session.invalidated_areas:
+			areas = Session.invalidated_areas
+			self.clear_request_cache()
+
+		self.refresh_invalidated(areas, invalidated.threadId, invalidated.stackFrameId)
+
+	# Only the responses that were invalidated are removed from the request cache and only what is shown is requested again
+	# stacks: the stack traces of the thread or the thread containing the frame, only the stacks that were loaded are requested again
+	# variables: the scopes and variables of the frame, they are only requested again if it is the selected frame
+	# thread_id/frame_id: limit stacks and variables to a thread or a frame, frame_id is used instead of thread_id if both are set
+	@core.run
+	async def refresh_invalidated(self, areas: set[str], thread_id: int | None, frame_id: int | None):
+		requests_sent = self.requests_sent
+
+		if frame_id is not None:
+			threads = [thread for thread in self.threads_for_id.values() if any(frame.id == frame_id for frame in thread.children_fetched)]
+		elif thread_id is not None:
+			threads = [self.threads_for_id[thread_id]] if thread_id in self.threads_for_id else []
+		else:
+			threads = list(self.threads_for_id.values())
+
+		refreshing: list[Awaitable[Any]] = []
+
+		if 'threads' in areas:
+			refreshing.append(self.schedule_threads_refresh(update=True))
+
+		if 'stacks' in areas:
+			thread_ids = {thread.id for thread in threads}
+			self.clear_request_cache({'stackTrace'}, lambda arguments: arguments['threadId'] in thread_ids)
+			refreshing.extend(self.refresh_stack(thread) for thread in threads if thread.stopped)
+
+		await core.gather_results(*refreshing)
+
+		if 'variables' in areas:
+			await self.refresh_invalidated_variables(threads, frame_id)
+
+		self.invalidated_requests = (sorted(areas), requests_sent, self.requests_sent)
+
+	async def refresh_stack(self, thread: Thread):
+		loaded = bool(thread.children_fetched)
+		thread.invalidate_children()
+		if not loaded:
+			return
+
+		frames = await thread.children()
+		if thread is self.selected_thread and self.selected_frame:
+			# the selected frame is replaced with the new frame with the same id and keeps its variables unless it is gone
+			frame = next((frame for frame in frames if frame.id == self.selected_frame.id), None)
+			if frame:
+				self.select(thread, frame, self.selected_explicitly, variables=self.variables)
 			else:
-				# found unhandled area so just invalidate the entire thing
-				invalidate_all = True
+				self.select(thread, first_non_subtle_frame(frames), self.selected_explicitly)
 
-		if invalidate_all or invalidate_threads:
-			self.refresh_threads()
+		self.on_updated_threads(self)
 
-		if invalidate_all or invalidate_variables:
-			if self.selected_frame:
-				core.run(self.refresh_scopes(self.selected_frame))
+	async def refresh_invalidated_variables(self, threads: list[Thread], frame_id: int | None):
+		selected_frame = self.selected_frame
+		selected_thread = self.selected_thread
 
-		if invalidate_all or invalidate_stacks:
-			for thread in self.threads:
-				...
-				# if thread.children
+		# variablesReference of every variable loaded for the selected frame
+		references: set[int] = set()
+
+		def add_references(variables: list[Variable]):
+			for variable in variables:
+				if variable.variablesReference:
+					references.add(variable.variablesReference)
+				add_references(variable.children_fetched)
+
+		add_references(self.variables)
+
+		def is_selected_frame(arguments: Any):
+			return bool(selected_frame) and arguments['frameId'] == selected_frame.id
+
+		if not selected_frame or not (frame_id == selected_frame.id if frame_id is not None else selected_thread in threads):
+			# every other frame is invalidated but nothing else is shown
+			self.clear_request_cache({'scopes'}, lambda arguments: not is_selected_frame(arguments))
+			self.clear_request_cache({'variables'}, lambda arguments: arguments['variablesReference'] not in references)
+			return
+
+		# the other frames of the thread are invalidated as well and there is no telling which frame a variablesReference belongs to so every variable is requested again
+		frame_ids = {frame.id for thread in threads for frame in thread.children_fetched}
+		frame_ids.add(selected_frame.id)
+		self.clear_request_cache({'scopes'}, lambda arguments: arguments['frameId'] in frame_ids)
+		self.clear_request_cache({'variables'})
+
+		variables = await self.fetch_scopes(selected_frame)
+
+		# a different frame was selected while these were loading
+		if selected_frame is not self.selected_frame:
+			return
+
+		self.select(selected_thread, selected_frame, self.selected_explicitly, variables=variables)
 
 	def on_event(self, event: str, body: Any):
 		if not self._transport:
@@ -959,3 +1452,10 @@ class Session(TransportListener, core.Dispose):
 			self.on_invalidated_event(body)
 		else:
 			core.run(self.adapter.on_custom_event(self, event, body))
+
+
+def first_non_subtle_frame(frames: list[api.StackFrame]) -> api.StackFrame | None:
+	for frame in frames:
+		if frame.presentationHint != 'subtle' and frame.source:
+			return frame
+	return frames[0] if frames else None
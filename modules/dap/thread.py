@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, Awaitable
 
 from .error import Error
 from .. import core
+from ..settings import Settings
 from . import api
 
 if TYPE_CHECKING:
@@ -19,24 +20,84 @@ class Thread:
 		self.stopped_event: api.StoppedEvent | None = None
 		self._children: core.Future[list[api.StackFrame]] | None = None
 
+		# when the adapter supports delayed stack trace loading frames are loaded a page at a time
+		# total_frames is the number of frames the adapter reported, it is None if the adapter did not report it
+		self.total_frames: int | None = None
+		self.more_frames = False
+		self.stopped_count = 0
+
 	def __str__(self) -> str:
 		return f'{self.id}: {self.name}'
 
 	def has_children(self) -> bool:
 		return self.stopped
 
+	def has_more_children(self) -> bool:
+		return self.stopped and self.more_frames
+
 	def children(self) -> Awaitable[list[api.StackFrame]]:
 		if not self.stopped:
 			raise Error('Cannot get children of thread that is not stopped')
 
 		if self._children:
 			return self._children
-		self._children = core.run(self.session.stack_trace(self.id))
+		self._children = core.run(self._load_children([]))
 		return self._children
 
-	def set_stopped(self, event: api.StoppedEvent | None):
-		self._children = None  # children are no longer valid
+	@property
+	def children_fetched(self) -> list[api.StackFrame]:
+		if self._children and self._children.done() and not self._children.cancelled() and not self._children.exception():
+			return self._children.result()
+		return []
+
+	# loads the next page of frames, the returned frames include the frames that were already loaded
+	def load_more_children(self) -> Awaitable[list[api.StackFrame]]:
+		previous = self._children
+		if not previous or not previous.done() or not self.has_more_children():
+			return self.children()
+
+		if previous.cancelled() or previous.exception():
+			self._children = None
+			return self.children()
+
+		self._children = core.run(self._load_children(previous.result()))
+		return self._children
+
+	# loads every page of frames that has not been loaded yet
+	async def all_children(self) -> list[api.StackFrame]:
+		frames = await self.children()
+		while self.has_more_children():
+			frames = await self.load_more_children()
+		return frames
 
+	async def _load_children(self, frames: list[api.StackFrame]) -> list[api.StackFrame]:
+		stopped_count = self.stopped_count
+		levels = Settings.stack_trace_page_size if self.session.capabilities.supportsDelayedStackTraceLoading else 0
+
+		response = await self.session.stack_trace(self.id, len(frames), levels)
+		page: list[api.StackFrame] = response['stackFrames']
+		total_frames: int | None = response.get('totalFrames')
+
+		frames = frames + page
+
+		# the thread continued and stopped again while these were loading
+		if stopped_count != self.stopped_count:
+			return frames
+
+		# if totalFrames is missing there are more frames until a page comes back short
+		self.total_frames = total_frames
+		self.more_frames = bool(levels) and len(page) == levels and (not total_frames or len(frames) < total_frames)
+		return frames
+
+	# the frames are loaded again the next time they are needed, frames that are still loading are discarded
+	def invalidate_children(self):
+		self._children = None
+		self.total_frames = None
+		self.more_frames = False
+		self.stopped_count += 1
+
+	def set_stopped(self, event: api.StoppedEvent | None):
+		self.invalidate_children()  # children are no longer valid
 		self.stopped = True
 
 		if event:
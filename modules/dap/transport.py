@@ -9,14 +9,20 @@
 	https://microsoft.github.io/debug-adapter-protocol/implementors/adapters/
 '''
 from __future__ import annotations
-from typing import Any, Awaitable, Protocol
+from typing import Any, Awaitable, Callable, Iterator, Protocol
 
 from .configuration import ConfigurationExpanded
 
 from ..import core
 from .error import Error
+from .recording import TransportRecorder
+from ..settings import Settings
 
+import os
 import threading
+import codecs
+import time
+from collections import deque
 from dataclasses import dataclass
 
 
@@ -34,6 +40,9 @@ class Transport:
 		...
 	def send_response(self, request: core.JSON, body: core.JSON, error: str|None = None) -> None:
 		...
+	# stops waiting for the response to a request returned from send_request, returns the seq of the request if it was still waiting for a response
+	def cancel_request(self, request: Awaitable[core.JSON]) -> int | None:
+		...
 
 class TransportListener (Protocol):
 	def on_event(self, event: str, body: core.JSON):
@@ -55,10 +64,17 @@ class TransportOutputLog:
 class TransportDataLog:
 	data: dict[str, Any]
 
+	prefix = ''
+
 	def __str__(self) -> str:
-		data: dict[str, Any] = self.data
-		data_formatted = core.json_encode(data)
+		return f'{self.prefix}{self.header()} {core.json_encode(self.data)}'
 
+	# the message without the body which can be large
+	def summary(self) -> str:
+		return f'{self.prefix}{self.header()} …'
+
+	def header(self) -> str:
+		data: dict[str, Any] = self.data
 		type = data.get('type')
 
 		def sigil(success: bool):
@@ -70,38 +86,143 @@ class TransportDataLog:
 		if type == 'response':
 			id = data.get('request_seq')
 			command = data.get('command')
-			return f'{command}({id}) {sigil(data.get("success", False))} {data_formatted}'
+			return f'{command}({id}) {sigil(data.get("success", False))}'
 
 		if type == 'request':
 			id = data.get('seq')
 			command = data.get('command')
-			return f'{command}({id}) :: {data_formatted}'
+			return f'{command}({id}) ::'
 
 		if type == 'event':
 			command = data.get('event')
 
-			return f'{command} .. {data_formatted}'
+			return f'{command} ..'
 
-		return f'unknown :: {data_formatted}'
+		return 'unknown ::'
 
 class TransportIncomingDataLog(TransportDataLog):
 	data: dict[str, Any]
 
-	def __str__(self) -> str:
-		return '-> ' + super().__str__()
+	prefix = '-> '
 
 class TransportOutgoingDataLog(TransportDataLog):
 	data: dict[str, Any]
 
-	def __str__(self) -> str:
-		return '<- ' + super().__str__()
+	prefix = '<- '
+
+class TransportFrameReader:
+	'''
+	Parses `Content-Length` framed messages out of a single growable buffer
+
+	Data is read straight into the free space at the end of the buffer and every complete frame the buffer holds is decoded from a slice of it. Large bodies that arrive in pieces are never concatenated and small messages do not need a syscall each.
+	'''
+
+	header_end = b'\r\n\r\n'
+	header_content_length = b'content-length'
+
+	def __init__(self, chunk_size: int = 2**16) -> None:
+		self.chunk_size = chunk_size
+		self.buffer = bytearray(chunk_size)
+
+		# unparsed data is buffer[start:end]
+		self.start = 0
+		self.end = 0
+
+		# size of the body for the frame currently being parsed once its header has been read
+		self.size: int | None = None
+
+		self.bytes_read = 0
+		self.messages_read = 0
+
+	def read(self, readinto: Callable[[memoryview], int]) -> int:
+		self.reserve()
+
+		with memoryview(self.buffer) as view:
+			with view[self.end:] as free:
+				n = readinto(free)
+
+		if not n:
+			raise EOFError
+
+		self.end += n
+		self.bytes_read += n
+		return n
+
+	def feed(self, data: bytes) -> None:
+		self.reserve(len(data))
+		self.buffer[self.end:self.end + len(data)] = data
+		self.end += len(data)
+		self.bytes_read += len(data)
+
+	def reserve(self, required: int = 0) -> None:
+		required = max(required, self.chunk_size)
+
+		# make sure the entire body of the current frame will fit so it can be decoded from a single slice
+		if self.size is not None:
+			required = max(required, self.size - (self.end - self.start))
+
+		if len(self.buffer) - self.end >= required:
+			return
+
+		# move the unparsed data to the front of the buffer, this is at most one partial frame
+		if self.start:
+			pending = self.end - self.start
+			self.buffer[:pending] = self.buffer[self.start:self.end]
+			self.start = 0
+			self.end = pending
+
+		if len(self.buffer) - self.end < required:
+			self.buffer.extend(bytes(max(required - (len(self.buffer) - self.end), len(self.buffer))))
+
+	def messages(self) -> Iterator[str]:
+		while True:
+			if self.size is None:
+				index = self.buffer.find(self.header_end, self.start, self.end)
+				if index == -1:
+					break
+
+				self.size = self.parse_header(self.buffer[self.start:index])
+				self.start = index + len(self.header_end)
+				if self.size is None:
+					continue
+
+			if self.end - self.start < self.size:
+				break
+
+			with memoryview(self.buffer) as view:
+				with view[self.start:self.start + self.size] as body:
+					message, _ = codecs.utf_8_decode(body, 'strict', True)
+
+			self.start += self.size
+			self.size = None
+			self.messages_read += 1
+			yield message
+
+		if self.start == self.end:
+			self.start = 0
+			self.end = 0
+
+			# don't hold on to the memory from a single very large message
+			if len(self.buffer) > self.chunk_size * 16:
+				self.buffer = bytearray(self.chunk_size)
+
+	# Content-Length: 119\r\n
+	# Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n (optional)
+	def parse_header(self, header: bytearray) -> int | None:
+		for line in header.split(b'\r\n'):
+			name, _, value = line.partition(b':')
+			if name.strip().lower() == self.header_content_length:
+				return int(value.strip())
+
+		core.error('Expecting Content-Length: header but did not...')
+		core.error(header)
+		return None
+
 
 class TransportStream(Transport):
 	def write(self, message: bytes):
 		...
-	def readline(self) -> bytes:
-		...
-	def read(self, n: int) -> bytes:
+	def readinto(self, buffer: memoryview) -> int:
 		...
 
 	async def setup(self):
@@ -115,13 +236,36 @@ class TransportStream(Transport):
 		self.pending_requests: dict[int, core.Future[core.JSON]] = {}
 		self.seq = 0
 
+		self.reader = TransportFrameReader()
+
+		# decoded messages are handed from the reader thread to the main thread in batches
+		self.messages: deque[core.JSON] = deque()
+		self.messages_lock = threading.Lock()
+		self.messages_scheduled = False
+		self.closed_message: str | None = None
+
+		# outgoing messages are encoded and written on the writer thread, the messages sent in one main loop iteration are written at once
+		self.outgoing_queued: list[dict[str, Any]] = []
+		self.outgoing: list[dict[str, Any]] = []
+		self.outgoing_condition = threading.Condition()
+		self.outgoing_closed = False
+
+		self.recorder: TransportRecorder | None = None
+		if directory := Settings.protocol_recording_directory:
+			self.recorder = TransportRecorder.create(os.path.expanduser(directory), configuration.name if configuration else 'session')
+
 		self.log('transport', f'-- begin transport protocol')
+		if self.recorder:
+			self.log('transport', f'-- recording to: {self.recorder.path}')
 
 		await self.setup()
 
 		self.thread = threading.Thread(target=self.read_transport, name='dap')
 		self.thread.start()
 
+		self.writer_thread = threading.Thread(target=self.write_transport, name='dap-writer')
+		self.writer_thread.start()
+
 	def dispose(self):
 		...
 
@@ -136,42 +280,111 @@ class TransportStream(Transport):
 	#     }
 	# }
 	def read_transport(self):
-		header = b'Content-Length: '
-		header_length = len(header)
+		reader = self.reader
+		recorder = self.recorder
 
 		try:
 			while True:
-				# handle Content-Length: 119\r\n
-				line = self.readline()
-				if not header.startswith(header):
-					core.error('Expecting Content-Length: header but did not...')
-					continue
+				reader.read(self.readinto)
+				for message in reader.messages():
+					if recorder:
+						recorder.record(True, message)
 
-				size = int(line[header_length:].strip())
+					self.messages.append(core.json_decode(message))
 
-				#handle \r\n
-				line = self.readline()
-				if line != b'\r\n':
-					core.error('Expected \\n\\r but did not find...')
-					core.error(line)
-					continue
+				self.schedule_dispatch_messages()
 
+		except Exception as e:
+			self.closed_message = '-- end transport protocol: ' + (str(e) or 'eof')
 
-				# read message
-				content = b''
-				while len(content) != size:
-					bytes_left = size - len(content)
-					content += self.read(bytes_left)
+		# nothing can be sent once the adapter has gone away
+		with self.outgoing_condition:
+			self.outgoing_closed = True
+			self.outgoing_condition.notify()
 
-				self.on_message(core.json_decode(content))
+		if recorder:
+			recorder.close()
 
-		except Exception as e:
-			msg = '-- end transport protocol: ' + (str(e) or 'eof')
-			core.call_soon(self.on_closed, msg)
+		self.schedule_dispatch_messages()
 
-	def send(self, message: dict[str, Any]):
+	def write_transport(self):
+		while True:
+			with self.outgoing_condition:
+				while not self.outgoing and not self.outgoing_closed:
+					self.outgoing_condition.wait()
+
+				if self.outgoing_closed:
+					return
+
+				messages = self.outgoing
+				self.outgoing = []
+
+			try:
+				self.write(b''.join(self.encode(message) for message in messages))
+			except Exception:
+				core.exception()
+				break
+
+		# the adapter can no longer be written to so close the transport, the reader then ends the same way as if the adapter had gone away
+		with self.outgoing_condition:
+			self.outgoing_closed = True
+			self.outgoing = []
+
+		core.call_soon(self.dispose)
+
+	def schedule_dispatch_messages(self):
+		with self.messages_lock:
+			if self.messages_scheduled:
+				return
+			self.messages_scheduled = True
+
+		core.call_soon(self.dispatch_messages)
+
+	# Handles as many of the queued messages as fit in the time budget on the main thread in the order the adapter sent them
+	def dispatch_messages(self):
+		with self.messages_lock:
+			self.messages_scheduled = False
+
+		end = time.perf_counter() + Settings.message_dispatch_budget / 1000
+
+		while self.messages:
+			try:
+				resolved_response = self.on_message(self.messages.popleft())
+			except Exception:
+				core.exception()
+				resolved_response = False
+
+			# anything awaiting a response must run before any of the messages that came after it
+			if resolved_response or time.perf_counter() > end:
+				self.schedule_dispatch_messages()
+				return
+
+		if self.closed_message is not None:
+			msg = self.closed_message
+			self.closed_message = None
+			self.on_closed(msg)
+
+	def encode(self, message: dict[str, Any]) -> bytes:
 		content = core.json_encode(message)
-		self.write(bytes(f'Content-Length: {len(content)}\r\n\r\n{content}', 'utf-8'))
+		if self.recorder:
+			self.recorder.record(False, content)
+
+		data = content.encode('utf-8')
+		return b'Content-Length: %d\r\n\r\n%s' % (len(data), data)
+
+	def send(self, message: dict[str, Any]):
+		self.outgoing_queued.append(message)
+		if len(self.outgoing_queued) == 1:
+			core.call_soon(self.flush_outgoing)
+
+	# hands everything sent during this main loop iteration to the writer thread at once
+	def flush_outgoing(self):
+		with self.outgoing_condition:
+			if not self.outgoing_closed:
+				self.outgoing.extend(self.outgoing_queued)
+			self.outgoing_condition.notify()
+
+		self.outgoing_queued.clear()
 
 	def send_request(self, command: str, args: core.JSON|None) -> Awaitable[core.JSON]:
 		future: core.Future[core.JSON] = core.Future()
@@ -183,6 +396,10 @@ class TransportStream(Transport):
 			'arguments': args
 		}
 
+		if self.outgoing_closed:
+			future.set_exception(Error('Debug adapter closed'))
+			return future
+
 		self.pending_requests[self.seq] = future
 
 		self.log('transport', TransportOutgoingDataLog(request))
@@ -224,6 +441,14 @@ class TransportStream(Transport):
 		self.log('transport', TransportOutgoingDataLog(data))
 		self.send(data)
 
+	def cancel_request(self, request: Awaitable[core.JSON]) -> int | None:
+		for seq, future in self.pending_requests.items():
+			if future is request:
+				del self.pending_requests[seq]
+				return seq
+
+		return None
+
 	def on_request(self, request: core.JSON):
 		command = request['command']
 
@@ -239,16 +464,23 @@ class TransportStream(Transport):
 
 
 	def on_event(self, event: str, body: Any):
-		# use call_soon so that events and respones are handled in the same order as the server sent them
-		core.call_soon(self.events.on_event, event, body)
+		self.events.on_event(event, body)
 
 	def on_closed(self, msg: str) -> None:
 		self.log('transport', msg)
 
+		# nothing is going to respond to the requests still waiting on the adapter
+		pending_requests = self.pending_requests
+		self.pending_requests = {}
+		for future in pending_requests.values():
+			if not future.done():
+				future.set_exception(Error('Debug adapter closed'))
+
 		# use call_soon so that events and respones are handled in the same order as the server sent them
 		core.call_soon(self.events.on_transport_closed)
 
-	def on_message(self, data: core.JSON) -> None:
+	# returns True if a pending request was resolved
+	def on_message(self, data: core.JSON) -> bool:
 		self.log('transport', TransportIncomingDataLog(data))
 
 		t = data['type']
@@ -258,24 +490,29 @@ class TransportStream(Transport):
 			except KeyError:
 				# the python adapter seems to send multiple initialized responses?
 				core.info("ignoring request request_seq not found")
-				return
+				return False
+
+			if future.done():
+				return False
 
 			success = data['success']
 			if not success:
 				body: core.JSON = data.get('body', {})
 				if error := body.get('error'):
 					future.set_exception(Error.from_message(error))
-					return
+					return True
 
 				future.set_exception(Error(data.get('message', 'no error message')))
-				return
+				return True
 			else:
 				body: core.JSON = data.get('body', {})
 				future.set_result(body)
-			return
+			return True
 
 		if t == 'request':
 			self.on_request(data)
 
 		if t == 'event':
 			self.on_event(data['event'], data.get('body', {}))
+
+		return False
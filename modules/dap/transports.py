@@ -1,12 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from io import BufferedReader, BufferedWriter
-from typing import IO, Any, Callable
+from typing import IO, TYPE_CHECKING, Any, Awaitable, Callable
+from collections import deque
 
 from .. import core
-from .transport import Transport, TransportListener, TransportOutputLog, TransportConnectionError, TransportStream
+from .configuration import ConfigurationExpanded
+from .error import Error
+from .recording import read_recording, decode_record
+from .transport import Transport, TransportListener, TransportOutputLog, TransportIncomingDataLog, TransportOutgoingDataLog, TransportConnectionError, TransportStream
+
+if TYPE_CHECKING:
+	from .. import dap
 
 import socket
+import json
 import os
 import subprocess
 import threading
@@ -142,17 +149,9 @@ class StdioTransport(TransportStream):
 		self.process.stdin.write(message)
 		self.process.stdin.flush()
 
-	def readline(self) -> bytes:
-		assert self.process
-		if l := self.process.stdout.readline():
-			return l
-		raise EOFError
-
-	def read(self, n: int) -> bytes:
+	def readinto(self, buffer: memoryview) -> int:
 		assert self.process
-		if l := self.process.stdout.read(n):
-			return l
-		raise EOFError
+		return self.process.stdout.readinto(buffer) or 0
 
 	def dispose(self) -> None:
 		if self.process:
@@ -174,9 +173,6 @@ class SocketTransport(TransportStream):
 
 	process: Process | None = None
 
-	socket_stdin: BufferedWriter | None = None
-	socket_stdout: BufferedReader | None = None
-
 	async def setup(self):
 		if self.command:
 			self.log('transport', f'-- socket transport process: {self.command}')
@@ -209,25 +205,11 @@ class SocketTransport(TransportStream):
 			self.process.on_stdout(self.stdout or (lambda data: self.log('transport', TransportOutputLog('stdout', data))))
 			self.process.on_stderr(self.stderr or (lambda data: self.log('transport', TransportOutputLog('stderr', data))))
 
-		self.socket_stdin = self.socket.makefile('wb')
-		self.socket_stdout = self.socket.makefile('rb')
-
 	def write(self, message: bytes) -> None:
-		assert self.socket_stdin
-		self.socket_stdin.write(message)
-		self.socket_stdin.flush()
-
-	def readline(self) -> bytes:
-		assert self.socket_stdout
-		if l := self.socket_stdout.readline():
-			return l
-		raise EOFError
+		self.socket.sendall(message)
 
-	def read(self, n: int) -> bytes:
-		assert self.socket_stdout
-		if l := self.socket_stdout.read(n):
-			return l
-		raise EOFError
+	def readinto(self, buffer: memoryview) -> int:
+		return self.socket.recv_into(buffer)
 
 	def dispose(self) -> None:
 		try:
@@ -237,3 +219,186 @@ class SocketTransport(TransportStream):
 
 		if self.process:
 			self.process.dispose()
+
+
+class ReplayTransport(Transport):
+	'''
+	Plays a recording made with the `protocol_recording_directory` setting back to a session
+
+	Messages from the adapter are played back in the order they were recorded. Playback waits for the session to send each request that was sent at that point in the recording so responses and events arrive in the same order relative to the session as they did originally.
+	Reverse requests from the adapter such as runInTerminal are not handed to the session, the response the session recorded is logged in its place.
+	Requests are matched to the recorded requests with the same command and arguments and the recorded response is sent back in their place. A request whose arguments were never recorded, for instance a launch request with a different configuration, takes the first recorded request with the same command.
+
+	speed: 1 plays back in real time, 2 twice as fast, None as fast as possible
+	wait: seconds to wait for the session to send a recorded request before skipping it
+	'''
+
+	def __init__(self, path: str, speed: float | None = 1, wait: float = 5) -> None:
+		self.path = path
+		self.speed = speed
+		self.wait = wait
+
+	async def start(self, listener: TransportListener, configuration: ConfigurationExpanded, log: dap.Console):
+		self.events = listener
+		self.log = log
+		self.seq = 0
+
+		self.recording = read_recording(self.path)
+
+		# recorded requests the session has not sent yet, seq -> (command, arguments)
+		self.unmatched: dict[int, tuple[str, str]] = {}
+		self.unmatched_for_command: dict[str, deque[int]] = {}
+		self.unmatched_for_arguments: dict[tuple[str, str], deque[int]] = {}
+
+		# recorded request seq -> the request the session sent in its place
+		self.matched: dict[int, core.Future[core.JSON]] = {}
+
+		self.waiting_seq: int | None = None
+		self.waiting: core.Future[None] | None = None
+
+		# recorded reverse request seq -> the response the session sent
+		self.reverse_responses: dict[int, Any] = {}
+
+		for record in self.recording:
+			if record.incoming:
+				continue
+
+			message = decode_record(record)
+			if message.get('type') == 'response':
+				self.reverse_responses[message['request_seq']] = message
+
+			elif message.get('type') == 'request':
+				key = self.request_key(message['command'], message.get('arguments'))
+				self.unmatched[message['seq']] = key
+				self.unmatched_for_command.setdefault(key[0], deque()).append(message['seq'])
+				self.unmatched_for_arguments.setdefault(key, deque()).append(message['seq'])
+
+		self.log('transport', f'-- replay transport: {self.path} speed={self.speed or "max"}')
+		self.playing = core.run(self.play())
+
+	# the recording may have been launched instead of attached or the other way around
+	def command_key(self, command: str) -> str:
+		return 'launch' if command == 'attach' else command
+
+	# the arguments are compared the way they are encoded so the arguments the session sends compare equal to the recorded ones
+	def request_key(self, command: str, arguments: Any) -> tuple[str, str]:
+		return self.command_key(command), json.dumps(json.loads(core.json_encode(arguments)), sort_keys=True)
+
+	def match(self, seq: int):
+		key = self.unmatched.pop(seq)
+		self.unmatched_for_command[key[0]].remove(seq)
+		self.unmatched_for_arguments[key].remove(seq)
+		return key
+
+	def dispose(self) -> None:
+		self.playing.cancel()
+
+	async def play(self):
+		previous = self.recording[0].time if self.recording else 0
+
+		for record in self.recording:
+			if not record.incoming:
+				message = decode_record(record)
+				if message.get('type') == 'request':
+					await self.wait_for_request(message['seq'])
+
+				previous = record.time
+				continue
+
+			if self.speed:
+				delay = (record.time - previous) / self.speed
+				if delay > 0.001:
+					await core.delay(delay)
+
+			previous = record.time
+
+			# anything awaiting a response must run before any of the messages that came after it
+			if self.dispatch(core.json_decode(record.content)):
+				await core.delay(0)
+
+		self.log('transport', '-- end replay transport')
+		self.events.on_transport_closed()
+
+	async def wait_for_request(self, seq: int):
+		if seq not in self.unmatched:
+			return
+
+		self.waiting_seq = seq
+		self.waiting = waiting = core.Future()
+		timer = core.call_later(self.wait, lambda: waiting.done() or waiting.set_result(None))
+		await waiting
+		timer.cancel()
+
+		self.waiting_seq = None
+		self.waiting = None
+
+		if seq in self.unmatched:
+			command, _ = self.match(seq)
+			self.log('transport', f'-- replay transport: skipped recorded `{command}` request the session did not send')
+
+	def dispatch(self, message: core.JSON) -> bool:
+		self.log('transport', TransportIncomingDataLog(message))
+
+		type = message['type']
+		if type == 'response':
+			future = self.matched.pop(message['request_seq'], None)
+			if not future or future.done():
+				return False
+
+			if message['success']:
+				future.set_result(message.get('body', {}))
+			elif error := message.get('body', {}).get('error'):
+				future.set_exception(Error.from_message(error))
+			else:
+				future.set_exception(Error(message.get('message', 'no error message')))
+
+			return True
+
+		if type == 'event':
+			self.events.on_event(message['event'], message.get('body', {}))
+
+		# handling these would launch terminals and sessions for real, the recording already has what the adapter did next
+		if type == 'request':
+			if response := self.reverse_responses.get(message['seq']):
+				self.log('transport', TransportOutgoingDataLog(response))
+			else:
+				self.log('transport', f'-- replay transport: no recorded response to `{message["command"]}` request')
+
+		return False
+
+	def send_request(self, command: str, args: core.JSON | None) -> Awaitable[core.JSON]:
+		self.seq += 1
+		self.log('transport', TransportOutgoingDataLog({'seq': self.seq, 'type': 'request', 'command': command, 'arguments': args}))
+
+		future: core.Future[core.JSON] = core.Future()
+
+		key = self.request_key(command, args)
+		recorded = self.unmatched_for_arguments.get(key) or self.unmatched_for_command.get(key[0])
+		if not recorded:
+			future.set_exception(Error(f'No `{command}` request left in the recording'))
+			return future
+
+		seq = recorded[0]
+		self.match(seq)
+		self.matched[seq] = future
+
+		if seq == self.waiting_seq and self.waiting:
+			self.waiting.set_result(None)
+
+		return future
+
+	def send_event(self, event: str, body: core.JSON) -> None:
+		self.seq += 1
+		self.log('transport', TransportOutgoingDataLog({'seq': self.seq, 'type': 'event', 'event': event, 'body': body}))
+
+	def send_response(self, request: core.JSON, body: core.JSON, error: str | None = None) -> None:
+		self.seq += 1
+		self.log('transport', TransportOutgoingDataLog({'seq': self.seq, 'type': 'response', 'request_seq': request['seq'], 'command': request['command'], 'body': body, 'success': not error, 'message': error}))
+
+	def cancel_request(self, request: Awaitable[core.JSON]) -> int | None:
+		for seq, future in self.matched.items():
+			if future is request:
+				del self.matched[seq]
+				return seq
+
+		return None
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 import os
 
 from ..import core
+from ..settings import Settings
 import sublime
 
 
@@ -42,7 +43,7 @@ class SourceLocation:
 
 
 class Variable:
-	def __init__(self, session: Session, name: str, value: str|None, variablesReference: int|None, containerVariablesReference: int|None = None, evaluateName: str|None = None, memoryReference: str|None = None) -> None:
+	def __init__(self, session: Session, name: str, value: str|None, variablesReference: int|None, containerVariablesReference: int|None = None, evaluateName: str|None = None, memoryReference: str|None = None, indexedVariables: int|None = None, namedVariables: int|None = None, start: int|None = None, expensive: bool = False) -> None:
 		self.session = session
 		self.name = name
 		self.evaluateName = evaluateName
@@ -50,8 +51,20 @@ class Variable:
 		self.variablesReference = variablesReference
 		self.containerVariablesReference = containerVariablesReference
 		self.memoryReference = memoryReference
+		self.indexedVariables = indexedVariables
+		self.namedVariables = namedVariables
+
+		# set for ranges like `[0..999]`, which are the indexedVariables children of the container starting at start
+		self.start = start
+		self.expensive = expensive
+
+		# the variable this is a child of, None for scopes and evaluation results
+		self.parent: Variable|None = None
 		self.fetched: Future[list[Variable]]|None = None
 
+		# the value is different from the last time the session stopped in this function, see Session.mark_changed_variables
+		self.changed = False
+
 
 	@staticmethod
 	def from_variable(session: Session, containerVariablesReference: int, variable: api.Variable):
@@ -63,6 +76,8 @@ class Variable:
 			containerVariablesReference,
 			variable.evaluateName,
 			variable.memoryReference,
+			variable.indexedVariables,
+			variable.namedVariables,
 		)
 
 	@staticmethod
@@ -72,6 +87,9 @@ class Variable:
 			scope.name,
 			None,
 			scope.variablesReference,
+			indexedVariables=scope.indexedVariables,
+			namedVariables=scope.namedVariables,
+			expensive=bool(scope.expensive),
 		)
 
 	@staticmethod
@@ -81,11 +99,66 @@ class Variable:
 			name,
 			evaluate.result,
 			evaluate.variablesReference,
+			indexedVariables=evaluate.indexedVariables,
+			namedVariables=evaluate.namedVariables,
 		)
 
+	@staticmethod
+	def from_range(container: Variable, start: int, count: int):
+		return Variable(
+			container.session,
+			f'[{start}..{start + count - 1}]',
+			None,
+			container.variablesReference,
+			indexedVariables=count,
+			start=start,
+		)
+
+	# the scope or evaluation name followed by the evaluateName or name of each variable down to this one
+	# these stay the same between stops unlike variablesReference
+	@property
+	def path(self) -> tuple[str, ...]:
+		if self.parent:
+			return self.parent.path + (self.evaluateName or self.name,)
+		return (self.name,)
+
+	@property
+	def children_fetched(self) -> list[Variable]:
+		if self.fetched and self.fetched.done() and not self.fetched.cancelled() and not self.fetched.exception():
+			return self.fetched.result()
+		return []
+
 	async def fetch(self):
+		children = await self.fetch_children()
+		for child in children:
+			child.parent = self
+		return children
+
+	async def fetch_children(self):
 		assert self.variablesReference
-		return await self.session.get_variables(self.variablesReference)
+		page_size = Settings.variables_page_size
+		indexed = self.indexedVariables or 0
+
+		if not page_size or indexed <= page_size:
+			if self.start is None:
+				return await self.session.get_variables(self.variablesReference)
+
+			return await self.session.get_variables(self.variablesReference, filter='indexed', start=self.start, count=indexed)
+
+		# split the indexed children into at most page_size ranges, ranges can contain ranges for really large collections
+		range_size = page_size
+		while indexed > range_size * page_size:
+			range_size *= page_size
+
+		children: list[Variable] = []
+		if self.start is None:
+			children = await self.session.get_variables(self.variablesReference, filter='named')
+
+		start = self.start or 0
+		for offset in range(0, indexed, range_size):
+			children.append(Variable.from_range(self, start + offset, min(range_size, indexed - offset)))
+
+		return children
 
 	async def children(self) -> list[Variable]:
 		if not self.has_children:
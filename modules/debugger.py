@@ -434,8 +434,8 @@ class Debugger(core.Dispose, dap.Debugger):
 
 		if session.stopped_unexpectedly:
 			found_error = False
-			for data in self.console.protocol.logs:
-				if isinstance(data, dap.TransportOutputLog):
+			for log_session, data in self.console.protocol.logs:
+				if log_session is session and isinstance(data, dap.TransportOutputLog):
 					found_error = True
 					self.console.error(data.output)
 
@@ -111,6 +111,7 @@ class Window:
     def is_valid(self): ...
     def hwnd(self): ...
     def active_sheet(self) -> Sheet: ...
+    def selected_sheets(self) -> List[Sheet]: ...
     def active_view(self) -> View: ...
     def run_command(self, cmd: str, args: Optional[Any] = ...) -> None: ...
     def new_file(self, flags: int = ..., syntax: str = ...) -> View: ...
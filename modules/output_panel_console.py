@@ -12,7 +12,7 @@ from . import ui
 from . import dap
 
 from .settings import Settings
-from .views.variable import VariableView
+from .views.variable import VariableView, VariableViewState
 
 from .ansi import ansi_colorize
 
@@ -67,6 +67,10 @@ class ConsoleOutputPanel(OutputPanel, dap.Console):
 		if at_bottom_ish:
 			self.scroll_to_end()
 
+	def update_settings(self):
+		super().update_settings()
+		self.protocol.update_settings()
+
 	def ensure_scrollback_size(self):
 		while len(self.phantoms) > Settings.console_scrollback_annotation_limit:
 			self.phantoms.pop(0).dispose()
@@ -227,6 +231,7 @@ class ConsoleOutputPanel(OutputPanel, dap.Console):
 
 	def write_variable(self, variable: dap.Variable, at: int):
 		expanded_phantom: ui.Phantom|None = None
+		state = VariableViewState()
 		phantom = ui.RawPhantom(self.view, sublime.Region(at, at), self.marker_html(core.platform.unicode_unchecked_sigil))
 		self.phantoms.append(phantom)
 
@@ -246,7 +251,7 @@ class ConsoleOutputPanel(OutputPanel, dap.Console):
 				expanded_phantom = p
 				self.phantoms.append(p)
 				with ui.div(width=10000):
-					view = VariableView(self.debugger, variable, children_only=True)
+					view = VariableView(self.debugger, variable, state=state, children_only=True)
 					view.set_expanded()
 
 		phantom.on_navigate = on_navigate
@@ -2,9 +2,11 @@ from __future__ import annotations
 from typing import Any
 
 import sublime
+from collections import deque
 
 from .import core
 from .import dap
+from .settings import Settings
 
 class ProtocolConsoleWindow(dap.Console):
 	def __init__(self) -> None:
@@ -16,7 +18,13 @@ class ProtocolConsoleWindow(dap.Console):
 
 		self.window = window
 		self.views: dict[dap.Session|None, sublime.View] = {}
-		self.logs = []
+
+		# the most recent messages for when the window is opened, protocol messages are kept without their bodies which can be several megabytes
+		self.logs: deque[tuple[dap.Session|None, Any]] = deque(maxlen=max(Settings.protocol_log_size, 1))
+
+		# messages waiting to be appended to the views, appended together on the next main loop iteration
+		self.pending: list[tuple[dap.Session|None, Any]] = []
+		self.pending_scheduled = False
 
 	def open(self):
 		if self.window and self.window.is_valid():
@@ -29,14 +37,25 @@ class ProtocolConsoleWindow(dap.Console):
 			settings.set('debugger.window', True)
 			settings.set('debugger.window.protocol', True)
 
+			# show everything that was recorded while the window was closed
+			self.views.clear()
+			self.pending = list(self.logs)
+			self.schedule_append_pending()
+
 		self.window.run_command('show_panel', {'panel': 'console'})
 
+	def update_settings(self):
+		size = max(Settings.protocol_log_size, 1)
+		if self.logs.maxlen != size:
+			self.logs = deque(self.logs, maxlen=size)
+
 	def clear(self):
 		for view in self.views.values():
 			view.close()
 
 		self.views.clear()
 		self.logs.clear()
+		self.pending.clear()
 
 	def dispose(self):
 		self.clear()
@@ -72,13 +91,37 @@ class ProtocolConsoleWindow(dap.Console):
 		return output
 
 	def log(self, type: str, value: Any, source: dap.SourceLocation|None = None, session: dap.Session|None = None):
+		self.logs.append((session, value.summary() if isinstance(value, dap.TransportDataLog) else value))
+
 		if not self.window:
 			return
 
-		self.logs.append(value)
+		self.pending.append((session, value))
+		self.schedule_append_pending()
+
+	def schedule_append_pending(self):
+		if self.pending_scheduled:
+			return
+
+		self.pending_scheduled = True
+		core.call_soon(self.append_pending)
+
+	def append_pending(self):
+		self.pending_scheduled = False
+
+		pending = self.pending
+		self.pending = []
+
+		if not pending or not self.window or not self.window.is_valid():
+			return
+
+		characters: dict[dap.Session|None, list[str]] = {}
+		for session, value in pending:
+			characters.setdefault(session, []).append(f'{value}\n')
 
-		self.view_for_session(session).run_command('append', {
-			'characters': f'{value}\n',
-			'force': True,
-			'scroll_to_end': True,
-		})
+		for session, lines in characters.items():
+			self.view_for_session(session).run_command('append', {
+				'characters': ''.join(lines),
+				'force': True,
+				'scroll_to_end': True,
+			})
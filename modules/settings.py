@@ -165,6 +165,61 @@ class Settings:
 		},
 	)
 
+	message_dispatch_budget = Setting[float](
+		key='message_dispatch_budget',
+		default=8,
+		description='Maximum time in milliseconds spent handling messages from a debug adapter before giving the ui a chance to update. Any remaining messages are handled shortly after.',
+	)
+
+	render_budget = Setting[float](
+		key='render_budget',
+		default=8,
+		description='Maximum time in milliseconds spent rendering the debugger ui before giving Sublime Text a chance to draw. The focused and visible parts of the ui are rendered first and anything remaining is rendered shortly after.',
+	)
+
+	protocol_log_size = Setting[int](
+		key='protocol_log_size',
+		default=10000,
+		description='Number of debug adapter protocol messages kept for when the protocol window is opened. Older messages are discarded. Messages logged while the window was closed are shown without their bodies.',
+	)
+
+	request_timeouts = Setting['dict[str, float]'](
+		key='request_timeouts',
+		default={
+			'evaluate': 30,
+			'variables': 30,
+			'scopes': 30,
+			'stackTrace': 30,
+			'threads': 30,
+			'completions': 10,
+			'exceptionInfo': 30,
+			'source': 30,
+			'dataBreakpointInfo': 30,
+			'readMemory': 30,
+			'disassemble': 30,
+			'cancel': 10,
+		},
+		description='Time in seconds to wait for a response to a request before giving up on it. Requests for commands not listed here and expressions evaluated from the console never time out. If the debug adapter supports it the request is also cancelled.',
+	)
+
+	stack_trace_page_size = Setting[int](
+		key='stack_trace_page_size',
+		default=20,
+		description='Number of stack frames requested at a time for debug adapters that support loading stack traces in pages. More frames are loaded from the callstack when they are needed. Set to 0 to always load entire stack traces.',
+	)
+
+	variables_page_size = Setting[int](
+		key='variables_page_size',
+		default=1000,
+		description='Maximum number of indexed children requested at once when expanding a variable. Larger collections are split into ranges like `[0..999]` that are loaded when expanded. Set to 0 to always load every child.',
+	)
+
+	protocol_recording_directory = Setting['str|None'](
+		key='protocol_recording_directory',
+		default=None,
+		description='When set every message exchanged with a debug adapter is recorded to a file in this directory. Recordings can be played back with the `replay` adapter.',
+	)
+
 
 # Settings __set__ method will not get called on a class so just override the class with an instance of itself...
 Settings = Settings()  # type: ignore
@@ -9,21 +9,22 @@ from .phantom import Phantom, Html, RawPhantom, RawAnnotation, Popup
 from .view import View, ViewRegistry
 from .html import div, span, text, icon, code, html_escape, html_escape_multi_line
 from .align import alignable, spacer, spacer_dip
+from .list import virtual_list
 from .css import css
 
 from .image import Images, Image
 from .input import *
 
 
-_update_timer: core.timer | None = None
 _debug_force_update_timer: core.timer | None = None
 
 
+# layouts are updated when something that can change them happens instead of polling every layout
+# the settings of each view are watched by the layouts in them and window commands, activating and closing views are forwarded from start.py
 def startup(debug: bool):
 	ViewRegistry.debug = debug
 	Images.shared = Images()
-	global _update_timer
-	_update_timer = core.timer(ViewRegistry.update_layouts, 0.2, True)
+	sublime.load_settings('Preferences.sublime-settings').add_on_change('debugger.layout', ViewRegistry.update_layouts)
 
 
 def update_and_render(invalidate=False):
@@ -46,8 +47,7 @@ def element_at_layout_position(view: sublime.View, position: tuple[float, float]
 	return None
 
 def shutdown():
-	if _update_timer:
-		_update_timer.dispose()
+	sublime.load_settings('Preferences.sublime-settings').clear_on_change('debugger.layout')
 	if _debug_force_update_timer:
 		_debug_force_update_timer.dispose()
 
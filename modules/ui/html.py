@@ -5,6 +5,7 @@ from ..core.typing_extensions import Unpack
 from .image import Image
 from .css import css
 
+import math
 import re
 
 if TYPE_CHECKING:
@@ -20,6 +21,15 @@ class alignable:
 HtmlResponse = Union[str, Iterable['HtmlResponse']]
 
 
+def flatten_html_response(items: HtmlResponse, list: list[str]):
+	if type(items) is str:
+		list.append(items)
+		return
+
+	for item in items:
+		flatten_html_response(item, list)
+
+
 class ContextStackMeta(type):
 	stack: ClassVar[list[list[element]]] = []
 	locked: ClassVar[int] = 0
@@ -42,6 +52,10 @@ class ContextStackMeta(type):
 class element(metaclass=ContextStackMeta):
 	Children = Union[Sequence['element'], 'element', None]
 
+	# if True and the element is reused when its parent renders again it keeps what it rendered unless it was dirtied, see View.render_element_tree
+	# only for elements whose rendered children depend on nothing but their own state like the items of long lists
+	keep_rendered: ClassVar[bool] = False
+
 	def __init__(self, is_inline: bool, width: float|None, height: float|None, css: css|None) -> None:
 		super().__init__()
 		self.layout: View = None #type: ignore
@@ -51,6 +65,11 @@ class element(metaclass=ContextStackMeta):
 		self.children_rendered_inline = False
 		self.requires_render = True
 
+		# what this element last generated keyed on what it was generated for, only a div uses these
+		# they are cleared along the path from the root to every element that renders again see View.render_element_tree
+		self.html_cache: tuple[Any, str]|None = None
+		self.html_height_cache: tuple[float, float]|None = None
+
 		self.is_inline = is_inline
 		self.height = height
 		self.width = width
@@ -98,6 +117,10 @@ class element(metaclass=ContextStackMeta):
 
 	def html_height(self, available_width: float, available_height: float) -> float: ...
 
+	def invalidate_html(self):
+		self.html_cache = None
+		self.html_height_cache = None
+
 	def dirty(self):
 		if self.layout:
 			self.layout.dirty()
@@ -124,11 +147,15 @@ class div (element):
 		if self.children_rendered_inline:
 			return 2.75
 
-		height = self.css_padding_height
-		for item in self.children_rendered:
-			height += item.html_height(available_width, available_height)
+		# the height of the children only depends on the available height when it clips them so cache it without it
+		if not self.html_height_cache or self.html_height_cache[0] != available_width:
+			height = self.css_padding_height
+			for item in self.children_rendered:
+				height += item.html_height(available_width, math.inf)
+
+			self.html_height_cache = (available_width, height)
 
-		return min(available_height, height)
+		return min(available_height, self.html_height_cache[1])
 
 	# width of a div matches the width of its parent div unless explicitly given
 	def html_width(self, available_width: float, available_height: float) -> float:
@@ -153,6 +180,11 @@ class div (element):
 		height = self.html_height(available_width, available_height) - self.css_padding_height
 		width = self.html_width(available_width, available_height) - self.css_padding_width
 
+		# the html only depends on the size it ends up with and the layout values (font size, background...) so a div that has not rendered again since it was generated for them can return what it generated last time
+		key = (width, height, self.layout, self.layout._layout_values)
+		if self.html_cache and self.html_cache[0] == key:
+			return self.html_cache[1]
+
 		tag, attributes = self.html_tag_and_attrbutes()
 
 		if self.children_rendered_inline:
@@ -162,10 +194,15 @@ class div (element):
 			# this makes it so that divs with an img in them and divs without an img in them all align the same
 			# and everything inside the div aligns vertically
 			offset = height / 2 - 0.5
-			return f'<{tag} {attributes} style="height:{height}rem; width:{width}rem; padding:{-offset}rem 0 {offset}rem 0"><img style="height:{height}rem">', html, f'</{tag}>'
+			response = f'<{tag} {attributes} style="height:{height}rem; width:{width}rem; padding:{-offset}rem 0 {offset}rem 0"><img style="height:{height}rem">', html, f'</{tag}>'
 		else:
 			html = self.html_inner(width, height)
-			return f'<{tag} {attributes} style="height:{height}rem;width:{width}rem;">', html, f'</{tag}>'
+			response = f'<{tag} {attributes} style="height:{height}rem;width:{width}rem;">', html, f'</{tag}>'
+
+		html_list: list[str] = []
+		flatten_html_response(response, html_list)
+		self.html_cache = (key, ''.join(html_list))
+		return self.html_cache[1]
 
 
 class span (element):
@@ -178,6 +215,7 @@ class span (element):
 	def __init__(self, css: css|None = None, **kwargs: Unpack[Params]) -> None:
 		super().__init__(True, None, None, css)
 		self.kwargs = kwargs
+		self.on_click_id: int|None = None
 
 	# height of a span is always just fixed since it doesn't change the layout
 	def html_height(self, available_width: float, available_height: float) -> float:
@@ -191,9 +229,9 @@ class span (element):
 		attributes = f'id="{self.css_id}"' if self.css_id else ''
 		tag = 's'
 
-		if on_click := self.kwargs.get('on_click'):
+		if self.kwargs.get('on_click'):
 			tag = 'a'
-			id = self.layout.register_on_click_handler(on_click)
+			id = self.layout.register_on_click_handler(self)
 			attributes += f' href="{id}"'
 
 		if title := self.kwargs.get('title'):
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Any, Callable
+
+from .html import div, text
+from .align import spacer
+from .css import css
+
+
+# Renders `count` rows by calling `row(index)` but only for the rows that fit in the viewport of the layout plus `overscan` rows
+# row is expected to create one element for the row the same way an element creates its children in render
+# the rows are expected to be `row_height` high (a single line is 3 the same as the html_height of a span) and expanded rows just push the rest of the window down
+# the rows outside of the window are replaced with controls that move the window a page at a time which only renders this list again
+# last is rendered after the last row once the window reaches it for instance to load more rows
+class virtual_list(div):
+	def __init__(self, count: int, row: Callable[[int], Any], start: int = 0, on_scroll: Callable[[int], Any] | None = None, last: Callable[[], Any] | None = None, row_height: float = 3, overscan: int = 2, name: str = 'items', indent: float = 3, control_css: css | None = None, css: css | None = None) -> None:
+		super().__init__(css=css)
+		self.count = count
+		self.row = row
+		self.last = last
+		self.start = start
+		self.on_scroll = on_scroll
+		self.row_height = row_height
+		self.overscan = overscan
+		self.name = name
+		self.indent = indent
+		self.control_css = control_css
+
+	def page(self) -> int:
+		return max(int(self.layout.height / self.row_height), 1) + self.overscan
+
+	def window(self) -> tuple[int, int]:
+		page = self.page()
+		start = max(min(self.start, self.count - page), 0)
+		return start, min(start + page, self.count)
+
+	def scroll(self, start: int):
+		self.start = max(min(start, self.count - self.page()), 0)
+		if self.on_scroll:
+			self.on_scroll(self.start)
+
+		self.dirty()
+
+	def control(self, label: str, on_click: Callable[[], Any]):
+		with div():
+			spacer(self.indent)
+			text(label, css=self.control_css, on_click=on_click)
+
+	def render(self):
+		start, end = self.window()
+
+		if start > 0:
+			self.control(f'{start} previous {self.name} …', lambda: self.scroll(start - self.page()))
+
+		for index in range(start, end):
+			self.row(index)
+
+		if end < self.count:
+			self.control(f'{self.count - end} more {self.name} …', lambda: self.scroll(start + self.page()))
+		elif self.last:
+			self.last()
@@ -26,6 +26,9 @@ class Phantom(View):
 		if not updated and self.pid is not None:
 			return False
 
+		if self.pid is not None and self.html_unchanged():
+			return False
+
 		self.render_phantom()
 
 		self.stats.render_time = timer.elapsed()
@@ -46,6 +49,7 @@ class Phantom(View):
 		if self.pid:
 			self.view.erase_phantom_by_id(self.pid)
 		self.pid = pid
+		self.html_updated()
 
 	def inside_region(self, position_x: float):
 		at: list[sublime.Region] = self.view.query_phantoms([self.pid])  # type: ignore (the typing is wrong its a list of regions)
@@ -129,6 +133,9 @@ class RawAnnotation:
 class Popup(View):
 	current: ClassVar[Popup | None] = None
 
+	# popups are shown over the view they are in
+	always_visible = True
+
 	def __init__(self, view: sublime.View, location: int = -1, on_close: Callable[[], None] | None = None) -> None:
 		super().__init__(view)
 
@@ -174,6 +181,9 @@ class Popup(View):
 		if not updated:
 			return False
 
+		if self.existing_popup and self.html_unchanged():
+			return False
+
 		self.create_or_update_popup()
 
 		self.stats.render_time = timer.elapsed()
@@ -187,3 +197,5 @@ class Popup(View):
 		else:
 			self.existing_popup = True
 			self.view.show_popup(self.html, location=self.location, max_width=self.max_width, max_height=self.max_height, on_navigate=self.on_navigate, flags=sublime.KEEP_ON_SELECTION_MODIFIED | sublime.HIDE_ON_MOUSE_MOVE_AWAY, on_hide=self.on_hide)
+
+		self.html_updated()
@@ -1,21 +1,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Callable, ClassVar, Type, cast
+from typing import Any, ClassVar, Optional, Tuple, Type, cast
 
 from .. import core
 from .css import css
-from .html import HtmlResponse, div, element
+from .html import div, element, span, flatten_html_response
 
 import sublime
-
-
-def flatten_html_response(items: HtmlResponse, list: list[str]):
-	if type(items) is str:
-		list.append(items)
-		return
-
-	for item in items:
-		flatten_html_response(item, list)
+import time
+import weakref
 
 
 @dataclass
@@ -28,6 +21,20 @@ class Stats:
 	render_time: float = 0
 	render_time_total: float = 0
 
+	# how many renders were given to sublime and how many were skipped because their html was the same as what sublime already has
+	update_count: int = 0
+	update_skipped_count: int = 0
+
+
+@dataclass
+class SchedulerStats:
+	render_count: int = 0
+	render_time: float = 0
+
+	# layouts left for a later frame because the budget ran out and layouts waiting for their view to become visible
+	deferred_count: int = 0
+	hidden_count: int = 0
+
 
 class ViewRegistry:
 	layouts_to_add: ClassVar[list[View]] = []
@@ -36,6 +43,14 @@ class ViewRegistry:
 	render_scheduled = False
 	debug = False
 
+	# milliseconds spent rendering layouts before giving sublime a chance to draw, the rest are rendered after
+	render_budget: ClassVar[float] = 8
+
+	# seconds the layout values of a view must stay the same before its layouts are invalidated
+	layout_debounce: ClassVar[float] = 0.5
+
+	stats = SchedulerStats()
+
 	@staticmethod
 	def register(view: View):
 		ViewRegistry.layouts_to_add.append(view)
@@ -44,13 +59,21 @@ class ViewRegistry:
 	def unregister(view: View):
 		ViewRegistry.layouts_to_remove.append(view)
 
+	# called when something that can change the layout values happens like a window command that resizes the panels or changing the settings, see start.py
+	# only the layouts in the window are checked if one is given and the values of every view are only read once
 	@staticmethod
-	def update_layouts():
-		for l in ViewRegistry.layouts:
-			l.update()
+	def update_layouts(window: sublime.Window | None = None):
+		values: dict[int, LayoutValues] = {}
 
-		if ViewRegistry.debug:
-			ViewRegistry.render_debug_info()
+		for layout in ViewRegistry.layouts:
+			if window and layout.view.window() != window:
+				continue
+
+			id = layout.view.id()
+			if id not in values:
+				values[id] = read_layout_values(layout.view)
+
+			layout.invalidate_layout_if_needed(values[id])
 
 	@staticmethod
 	def render_debug_info():
@@ -58,10 +81,42 @@ class ViewRegistry:
 		for r in ViewRegistry.layouts:
 			if r.view.window() == sublime.active_window():
 				status += '         '
-				status += f'{r.stats.name}: {len(r.html) / 1024:.1f}kb {r.stats.render_time:.1f}ms {r.stats.render_count}x'
+				status += f'{r.stats.name}: {len(r.html) / 1024:.1f}kb {r.stats.render_time:.1f}ms {r.stats.render_count}x {r.stats.update_skipped_count}/{r.stats.update_count} skipped'
+
+		stats = ViewRegistry.stats
+		status += f'         render: {stats.render_time:.1f}ms {stats.render_count}x {stats.deferred_count} deferred {stats.hidden_count} hidden'
 
 		sublime.active_window().status_message(status)
 
+	# lower renders first, the focused view then visible views in the active window then visible views in other windows
+	# None for layouts that are not visible like the ones in a hidden output panel or in a tab that is not selected
+	@staticmethod
+	def render_priorities(layouts: list[View]) -> dict[int, int]:
+		priorities: dict[int, int] = {}
+
+		active_window = sublime.active_window()
+		windows: dict[int, sublime.Window] = {}
+		for layout in layouts:
+			if window := layout.view.window():
+				windows[window.id()] = window
+
+		for window in windows.values():
+			priority = 1 if window == active_window else 2
+
+			# the active sheet of every group and any other sheets selected alongside it are visible
+			for sheet in window.selected_sheets():
+				if view := sheet.view():
+					priorities[view.id()] = priority
+
+			panel = window.active_panel()
+			if panel and panel.startswith('output.') and (view := window.find_output_panel(panel[len('output.'):])):
+				priorities[view.id()] = priority
+
+			if window == active_window and (view := window.active_view()):
+				priorities[view.id()] = 0
+
+		return priorities
+
 	@staticmethod
 	def render_layouts():
 		ViewRegistry.render_scheduled = False
@@ -77,20 +132,62 @@ class ViewRegistry:
 
 		ViewRegistry.layouts_to_remove.clear()
 
-		for r in ViewRegistry.layouts:
-			r.render()
+		started = time.perf_counter()
+		end = started + ViewRegistry.render_budget / 1000
+
+		priorities = ViewRegistry.render_priorities([layout for layout in ViewRegistry.layouts if layout.requires_render])
+		pending: list[tuple[int, View]] = []
+		hidden = 0
+
+		for layout in ViewRegistry.layouts:
+			if not layout.requires_render:
+				continue
+
+			priority = 0 if layout.always_visible else priorities.get(layout.view.id())
+			if priority is None:
+				hidden += 1
+			else:
+				pending.append((priority, layout))
+
+		pending.sort(key=lambda item: item[0])
+
+		deferred = 0
+		for index, (_, layout) in enumerate(pending):
+			# always render at least one layout so everything is rendered eventually
+			if index and time.perf_counter() > end:
+				deferred = len(pending) - index
+				ViewRegistry.schedule_render()
+				break
+
+			layout.render()
+
+		stats = ViewRegistry.stats
+		stats.render_count += 1
+		stats.render_time = (time.perf_counter() - started) * 1000
+		stats.deferred_count = deferred
+		stats.hidden_count = hidden
 
 		if ViewRegistry.debug:
 			ViewRegistry.render_debug_info()
 
+	# layouts that were not rendered because they were not visible are rendered once they are
 	@staticmethod
-	def invalidated_view(view: View) -> None:
+	def visibility_changed() -> None:
+		if ViewRegistry.stats.hidden_count:
+			ViewRegistry.schedule_render()
+
+	@staticmethod
+	def schedule_render() -> None:
 		if ViewRegistry.render_scheduled:
 			return
 
 		ViewRegistry.render_scheduled = True
 		core.call_soon(ViewRegistry.render_layouts)
 
+	@staticmethod
+	def invalidated_view(view: View) -> None:
+		ViewRegistry.schedule_render()
+
 	@staticmethod
 	def view_at_position(view: sublime.View, layout_position: tuple[float, float]):
 		found_layout = None
@@ -102,6 +199,9 @@ class ViewRegistry:
 
 
 class View:
+	# rendered even when the view it is in is not visible see ViewRegistry.render_priorities
+	always_visible: ClassVar[bool] = False
+
 	def __init__(self, view: sublime.View) -> None:
 		self.stats = Stats(name=view.name())
 
@@ -109,6 +209,9 @@ class View:
 		self.html_list: list[str] = []
 		self.html = ''
 
+		# hash of the html sublime was last given see Phantom and Popup
+		self.html_hash: int|None = None
+
 		self.view = view
 
 		self.luminocity = 0.0
@@ -125,10 +228,11 @@ class View:
 		self.font_size = 1.0
 		self.em_width = 1.0
 
-		self._layout_values = ()
-		self._last_check_was_differnt = 0
+		self._layout_values: LayoutValues | None = None
+		self._invalidate_timer: core.timer | None = None
 
-		self._on_click_handlers: dict[int, Callable[[], None]] = {}
+		# elements keep their ids for as long as they exist since their html can be reused across renders
+		self._on_click_handlers: weakref.WeakValueDictionary[int, span] = weakref.WeakValueDictionary()
 		self._on_click_handlers_id = 0
 
 		self.item = div()
@@ -136,6 +240,10 @@ class View:
 
 		self.update()
 
+		# settings of the view include the ones it inherits so this is also called when the color scheme or font size changes
+		self.settings_key = f'debugger.layout.{id(self)}'
+		self.view.settings().add_on_change(self.settings_key, self.update)
+
 		ViewRegistry.register(self)
 
 	def __str__(self):
@@ -173,6 +281,9 @@ class View:
 
 	def dispose(self) -> None:
 		ViewRegistry.unregister(self)
+		self.view.settings().clear_on_change(self.settings_key)
+		if self._invalidate_timer:
+			self._invalidate_timer.dispose()
 
 	def inside_region(self, position_x: float) -> bool:
 		return True
@@ -209,14 +320,25 @@ class View:
 			child.removed()
 			child.layout = None  # type: ignore
 
-	def render_element_tree(self, item: element, requires_render: bool = False) -> None:
+	def _add_element_tree(self, parent: element) -> None:
+		self._add_element_children(parent)
+		for child in parent.children_rendered:
+			self._add_element_tree(child)
+
+	# returns True if anything in the tree rendered again in which case the html each element on the way there cached is no longer valid
+	def render_element_tree(self, item: element, requires_render: bool = False) -> bool:
 		if not requires_render and not item.requires_render:
 			# check the children elements
+			rendered = False
 			for child in item.children_rendered:
-				self.render_element_tree(child)
-			return
+				rendered = self.render_element_tree(child) or rendered
+
+			if rendered:
+				item.invalidate_html()
+			return rendered
 
 		item.requires_render = False
+		item.invalidate_html()
 
 		# remove old and add new
 		self._remove_element_children(item)
@@ -224,14 +346,20 @@ class View:
 		self._add_element_children(item)
 
 		# all the children must be rendered since the parent required rendering
+		# except reused children that keep what they rendered, they are added back as they were and only their dirty children are rendered
 		for child in item.children_rendered:
-			self.render_element_tree(child, True)
+			if child.keep_rendered and not child.requires_render:
+				self._add_element_tree(child)
+				self.render_element_tree(child)
+			else:
+				self.render_element_tree(child, True)
+
+		return True
 
 	def render(self) -> bool:
 		if not self.requires_render:
 			return False
 
-		self._on_click_handlers.clear()
 		self.requires_render = False
 
 		self.render_element_tree(self.item)
@@ -244,48 +372,46 @@ class View:
 		self.html = ''.join(self.html_list)
 		return True
 
-	def on_navigate(self, path: str) -> None:
-		id = int(path)
-		if id in self._on_click_handlers:
-			self._on_click_handlers[id]()
+	# the html is often the same as the last time it was rendered, for instance when the layout was invalidated without anything that changes the html changing
+	def html_unchanged(self) -> bool:
+		if hash(self.html) != self.html_hash:
+			return False
 
-	def register_on_click_handler(self, callback: Callable[[], None]) -> str:
-		self._on_click_handlers_id += 1
-		id = self._on_click_handlers_id
-		self._on_click_handlers[id] = callback
-		return str(id)
+		self.stats.update_skipped_count += 1
+		return True
 
-	def update(self) -> None:
-		self.invalidate_layout_if_needed()
+	def html_updated(self) -> None:
+		self.html_hash = hash(self.html)
+		self.stats.update_count += 1
 
-	def invalidate_layout_if_needed(self):
-		style = self.view.style()
-		background = style.get('background') if style else None
+	def on_navigate(self, path: str) -> None:
+		id = int(path)
+		if (item := self._on_click_handlers.get(id)) and (on_click := item.kwargs.get('on_click')):
+			on_click()
 
-		settings = self.view.settings()
-		font_size = settings.get('font_size') or 12
+	def register_on_click_handler(self, item: span) -> str:
+		if item.on_click_id is None or self._on_click_handlers.get(item.on_click_id) is not item:
+			self._on_click_handlers_id += 1
+			item.on_click_id = self._on_click_handlers_id
+			self._on_click_handlers[item.on_click_id] = item
 
-		internal_font_scale = settings.get('internal_font_scale', 1)
-		internal_width_modifier = settings.get('internal_width_modifier', 0)
+		return str(item.on_click_id)
 
-		viewport_width, viewport_height = self.view.viewport_extent()
-		layout_width, _ = self.view.layout_extent()
+	def update(self) -> None:
+		self.invalidate_layout_if_needed()
 
-		em_width = self.view.em_width() or 1
+	def invalidate_layout_if_needed(self, layout_values: LayoutValues | None = None):
+		layout_values = layout_values or read_layout_values(self.view)
 
 		# check if anything has changed so we can avoid invalidating the layout
-		layout_values = (background, font_size, internal_font_scale, internal_width_modifier, em_width, viewport_width, viewport_height, layout_width)
-
 		if self._layout_values == layout_values:
-			# only invalidate the layout after the user has stopped changing the layout to avoid redrawing while they are changing stuff
-			if self._last_check_was_differnt == 0:
-				self.invalidate()
-
-			self._last_check_was_differnt -= 1
 			return
 
+		first_layout = self._layout_values is None
 		self._layout_values = layout_values
 
+		background, font_size, internal_font_scale, internal_width_modifier, em_width, viewport_width, viewport_height, layout_width = layout_values
+
 		self.layout_width = layout_width / em_width
 
 		self.internal_font_scale = internal_font_scale
@@ -293,10 +419,39 @@ class View:
 
 		self.font_size = font_size
 		self.width = viewport_width / em_width
+		self.height = viewport_height / em_width
 		self.luminocity = lightness_from_color(background)
 		self.em_width = em_width
 
-		self._last_check_was_differnt = 5
+		# new layouts are rendered with these values anyway so there is nothing to invalidate
+		if first_layout:
+			return
+
+		# only invalidate the layout after the user has stopped changing the layout to avoid redrawing while they are changing stuff
+		if self._invalidate_timer:
+			self._invalidate_timer.dispose()
+
+		self._invalidate_timer = core.timer(self.invalidate, ViewRegistry.layout_debounce)
+
+
+LayoutValues = Tuple[Optional[str], float, float, float, float, float, float, float]
+
+
+def read_layout_values(view: sublime.View) -> LayoutValues:
+	style = view.style()
+	background = style.get('background') if style else None
+
+	settings = view.settings()
+	font_size = settings.get('font_size') or 12
+
+	internal_font_scale = settings.get('internal_font_scale', 1)
+	internal_width_modifier = settings.get('internal_width_modifier', 0)
+
+	viewport_width, viewport_height = view.viewport_extent()
+	layout_width, _ = view.layout_extent()
+
+	em_width = view.em_width() or 1
+	return (background, font_size, internal_font_scale, internal_width_modifier, em_width, viewport_width, viewport_height, layout_width)
 
 
 def lightness_from_color(color: str | None) -> float:
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Hashable
 
 import sublime
 
@@ -18,28 +18,61 @@ if TYPE_CHECKING:
 	from ..output_panel import OutputPanel
 
 
+# sessions are keyed by their parent, their configuration and their position among the sibling sessions with the same configuration and threads by their id so the state is kept when a session is restarted
 class CallStackState:
-	def __init__(self):
-		self._expanded: dict[int, bool] = {}
+	def __init__(self, debugger: Debugger):
+		self.debugger = debugger
+		self._expanded: dict[Hashable, bool] = {}
+		self._start: dict[Hashable, int] = {}
+
+	def key(self, item: Any) -> Hashable:
+		if isinstance(item, dap.Session):
+			if item.parent:
+				parent = self.key(item.parent)
+				siblings = item.parent.children
+			else:
+				parent = None
+				siblings = [session for session in self.debugger.sessions if not session.parent]
+
+			id_ish = item.configuration.id_ish
+			index = 0
+			for session in siblings:
+				if session is item:
+					break
+				if session.configuration.id_ish == id_ish:
+					index += 1
+
+			return (parent, id_ish, index)
+
+		if isinstance(item, dap.Thread):
+			return (self.key(item.session), item.id)
+		return id(item)
 
 	def is_expanded(self, item: Any, default: bool = False):
-		expanded = self._expanded.get(id(item))
+		expanded = self._expanded.get(self.key(item))
 		if expanded is None:
 			return default
 		return expanded
 
 	def set_expanded(self, item: Any, value: bool):
-		self._expanded[id(item)] = value
+		self._expanded[self.key(item)] = value
 
 	def toggle_expanded(self, item: Any, default: bool = False):
-		self._expanded[id(item)] = not self.is_expanded(item, default)
+		self._expanded[self.key(item)] = not self.is_expanded(item, default)
+
+	# the first frame shown when the frames of a thread do not fit in the panel
+	def start(self, item: Any) -> int:
+		return self._start.get(self.key(item), 0)
+
+	def set_start(self, item: Any, value: int):
+		self._start[self.key(item)] = value
 
 
 class CallstackView(ui.div, core.Dispose):
 	def __init__(self, debugger: Debugger):
 		super().__init__()
 		self.debugger = debugger
-		self.state = CallStackState()
+		self.state = CallStackState(debugger)
 
 	def added(self):
 		self.dispose_add(
@@ -151,7 +184,8 @@ class SessionView(ui.div):
 		for thread in self.session.threads:
 			result += f'{thread.name}\n'
 
-			for frame in await thread.children():
+			# the whole stack not just the pages that have been loaded
+			for frame in await thread.all_children():
 				result += f'\t{frame.name}\n'
 
 		sublime.set_clipboard(result)
@@ -194,6 +228,11 @@ class ThreadView(ui.div):
 		self.fetch()
 		self.dirty()
 
+	@core.run
+	async def load_more_frames(self):
+		self.frames = await self.thread.load_more_children()
+		self.dirty()
+
 	def on_select_thread(self):
 		self.session.set_selected(self.thread, None)
 
@@ -235,7 +274,8 @@ class ThreadView(ui.div):
 		if not is_expanded:
 			return
 
-		for frame in self.frames:
+		def frame_row(index: int):
+			frame = self.frames[index]
 			is_frame_selected = self.is_selected and self.session.selected_frame == frame
 
 			with ui.div(css=css.selected if is_frame_selected else None):
@@ -265,6 +305,21 @@ class ThreadView(ui.div):
 
 						ui.text('☰', css=css.button, on_click=self.on_select_frame_instructions_view)
 
+		def load_more_frames():
+			if not self.frames or not self.thread.has_more_children():
+				return
+
+			total_frames = self.thread.total_frames
+			with ui.div():
+				ui.spacer([1, 3][self.show_thread_name])
+				if total_frames:
+					ui.text('{} more frames …'.format(total_frames - len(self.frames)), css=css.secondary, on_click=self.load_more_frames)
+				else:
+					ui.text('load more frames …', css=css.secondary, on_click=self.load_more_frames)
+
+		# only the frames that fit in the panel are rendered
+		ui.virtual_list(len(self.frames), frame_row, start=self.state.start(self.thread), on_scroll=lambda start: self.state.set_start(self.thread, start), last=load_more_frames, name='frames', indent=[1, 3][self.show_thread_name], control_css=css.secondary)
+
 
 class CopyCallstack(ActionElement):
 	name = 'Copy Callstack'
@@ -77,6 +77,10 @@ yellowish = ui.css(
 bluish = ui.css(
 	color='var(--bluish)',
 )
+changed = ui.css(
+	background_color='color(var(--yellowish) alpha(0.25))',
+	radius=0.3,
+)
 
 padding = ui.css(
 	padding_left=0.5,
@@ -19,6 +19,8 @@ class ModulesTabbedView(TabbedView, core.Dispose):
 		super().__init__('Modules')
 		self.debugger = debugger
 		self.expanded: dict[Any, bool] = {}
+		self.items: dict[tuple[dap.Session, int | str], ModuleView] = {}
+		self.start = 0
 		self._visible = False
 
 	def added(self) -> None:
@@ -49,46 +51,79 @@ class ModulesTabbedView(TabbedView, core.Dispose):
 	def is_expanded(self, module: dap.Module):
 		return self.expanded.get(module.id, False)
 
-	def toggle_expanded(self, module: dap.Module):
-		if self.is_expanded(module):
-			self.expanded[module.id] = False
-		else:
-			self.expanded[module.id] = True
+	def toggle_expanded(self, item: ModuleView):
+		self.expanded[item.module.id] = not self.is_expanded(item.module)
+		item.dirty()
 
-		self.dirty()
+	def scrolled(self, start: int):
+		self.start = start
 
+	# only the modules that fit in the panel are rendered
+	# modules that did not change since the last render reuse their ModuleView so only new and changed modules are rendered
 	def render(self):
+		rows: list[tuple[dap.Session, dap.Module | None]] = []
 		for session in self.debugger.sessions:
-			with ui.div():
-				ui.text(session.name)
+			rows.append((session, None))
+			rows.extend((session, module) for module in session.modules.values())
 
-			for module in session.modules.values():
-				is_expanded = self.is_expanded(module)
-				image_toggle = ui.Images.shared.open if is_expanded else ui.Images.shared.close
+		previous = self.items
+		self.items = {}
+
+		def row(index: int):
+			session, module = rows[index]
+			if not module:
 				with ui.div():
-					ui.icon(image_toggle, on_click=lambda module=module: self.toggle_expanded(module))
-					ui.text(module.name)
-
-				if is_expanded:
-					with ui.div(css=css.table_inset):
-
-						def add_item(label: str, value: Any):
-							if value is None:
-								return
-
-							def copy():
-								ui.InputList(value)[ui.InputListItem(lambda: sublime.set_clipboard(value), 'Copy')].run()
-
-							value_str = str(value)
-							with ui.div(height=3):
-								with ui.span(on_click=copy):
-									ui.text(label, css=css.secondary)
-									ui.spacer(1)
-									ui.text(value_str, css=css.label)
-
-						add_item('version', module.version)
-						add_item('optimized', module.isOptimized)
-						add_item('path', module.path)
-						add_item('symbols', module.symbolStatus)
-						add_item('symbol file path', module.symbolFilePath)
-						add_item('load address', module.addressRange)
+					ui.text(session.name)
+				return
+
+			key = (session, module.id)
+			item = self.items.get(key) or previous.get(key)
+			if item and item.module is module:
+				item.append_stack()
+			else:
+				item = ModuleView(self, module)
+
+			self.items[key] = item
+
+		ui.virtual_list(len(rows), row, start=self.start, on_scroll=self.scrolled, name='modules', control_css=css.secondary)
+
+
+class ModuleView(ui.div):
+	keep_rendered = True
+
+	def __init__(self, modules: ModulesTabbedView, module: dap.Module):
+		super().__init__()
+		self.modules = modules
+		self.module = module
+
+	def render(self):
+		module = self.module
+		is_expanded = self.modules.is_expanded(module)
+		image_toggle = ui.Images.shared.open if is_expanded else ui.Images.shared.close
+		with ui.div():
+			ui.icon(image_toggle, on_click=lambda: self.modules.toggle_expanded(self))
+			ui.text(module.name)
+
+		if is_expanded:
+			with ui.div(css=css.table_inset):
+
+				def add_item(label: str, value: Any):
+					if value is None:
+						return
+
+					def copy():
+						ui.InputList(value)[ui.InputListItem(lambda: sublime.set_clipboard(value), 'Copy')].run()
+
+					value_str = str(value)
+					with ui.div(height=3):
+						with ui.span(on_click=copy):
+							ui.text(label, css=css.secondary)
+							ui.spacer(1)
+							ui.text(value_str, css=css.label)
+
+				add_item('version', module.version)
+				add_item('optimized', module.isOptimized)
+				add_item('path', module.path)
+				add_item('symbols', module.symbolStatus)
+				add_item('symbol file path', module.symbolFilePath)
+				add_item('load address', module.addressRange)
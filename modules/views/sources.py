@@ -18,6 +18,8 @@ class SourcesTabbedView(TabbedView, core.Dispose):
 		super().__init__('Sources')
 		self.debugger = debugger
 		self.on_click = on_click
+		self.items: dict[tuple[dap.Session, int | str], SourceView] = {}
+		self.start = 0
 		self._visible = False
 
 
@@ -49,8 +51,39 @@ class SourcesTabbedView(TabbedView, core.Dispose):
 	def on_clicked_source(self, source: dap.Source):
 		self.on_click(dap.SourceLocation(source, None, None))
 
+	def scrolled(self, start: int):
+		self.start = start
+
+	# only the sources that fit in the panel are rendered
+	# sources that did not change since the last render reuse their SourceView so only new and changed sources are rendered
 	def render(self):
-		for session in self.debugger.sessions:
-			for source in session.sources.values():
-				with ui.div():
-					ui.text(source.path or source.name or '<no source name>', css=css.secondary, on_click=partial(self.on_clicked_source, source))
+		rows = [(session, id, source) for session in self.debugger.sessions for id, source in session.sources.items()]
+
+		previous = self.items
+		self.items = {}
+
+		def row(index: int):
+			session, id, source = rows[index]
+
+			key = (session, id)
+			item = self.items.get(key) or previous.get(key)
+			if item and item.source is source:
+				item.append_stack()
+			else:
+				item = SourceView(self, source)
+
+			self.items[key] = item
+
+		ui.virtual_list(len(rows), row, start=self.start, on_scroll=self.scrolled, name='sources', control_css=css.secondary)
+
+
+class SourceView(ui.div):
+	keep_rendered = True
+
+	def __init__(self, sources: SourcesTabbedView, source: dap.Source):
+		super().__init__()
+		self.sources = sources
+		self.source = source
+
+	def render(self):
+		ui.text(self.source.path or self.source.name or '<no source name>', css=css.secondary, on_click=partial(self.sources.on_clicked_source, self.source))
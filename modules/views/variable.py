@@ -13,30 +13,47 @@ if TYPE_CHECKING:
 	from ..debugger import Debugger
 
 
+# keyed by variable paths so expanded variables stay expanded after stepping
+# only the variables panel sets prefetch since the session only prefetches the scopes of the selected frame
 class VariableViewState:
-	def __init__(self):
-		self._expanded: dict[int, bool] = {}
-		self._number_expanded: dict[int, int] = {}
+	def __init__(self, prefetch: bool = False):
+		self.prefetch = prefetch
+		self._expanded: set[tuple[str, ...]] = set()
+		self._start: dict[tuple[str, ...], int] = {}
 
 	def is_expanded(self, variable: dap.Variable) -> bool:
-		return self._expanded.get(id(variable), False)
+		return variable.path in self._expanded
 
 	def set_expanded(self, variable: dap.Variable, value: bool):
-		self._expanded[id(variable)] = value
+		if value:
+			self._expanded.add(variable.path)
+		else:
+			self._expanded.discard(variable.path)
+
+		# the session prefetches the children of expanded variables the next time it stops
+		if not self.prefetch:
+			return
 
-	def number_expanded(self, variable: dap.Variable) -> int:
-		return self._number_expanded.get(id(variable), 20)
+		if value:
+			variable.session.expanded_variable_paths.add(variable.path)
+		else:
+			variable.session.expanded_variable_paths.discard(variable.path)
+
+	# the first child shown when the children of the variable do not fit in the panel
+	def start(self, variable: dap.Variable) -> int:
+		return self._start.get(variable.path, 0)
 
-	def set_number_expanded(self, variable: dap.Variable, value: int):
-		self._number_expanded[id(variable)] = value
+	def set_start(self, variable: dap.Variable, value: int):
+		self._start[variable.path] = value
 
 
 class VariableView(ui.div):
-	def __init__(self, debugger: Debugger, variable: dap.Variable, state=VariableViewState(), children_only=False, on_remove: Callable[[], None] | None = None) -> None:
+	# state is shared with the children of the variable, views that are created again on every render need to pass in a state that outlives them
+	def __init__(self, debugger: Debugger, variable: dap.Variable, state: VariableViewState | None = None, children_only=False, on_remove: Callable[[], None] | None = None) -> None:
 		super().__init__()
 		self.variable = variable
 		self.debugger = debugger
-		self.state = state
+		self.state = state or VariableViewState()
 		self.children_only = children_only
 		self.on_remove = on_remove
 
@@ -89,6 +106,8 @@ class VariableView(ui.div):
 			response = await session.set_variable(containerVariablesReference, name, value)
 			self.variable.value = response.value
 			self.variable.variablesReference = response.variablesReference
+			self.variable.indexedVariables = response.indexedVariables
+			self.variable.namedVariables = response.namedVariables
 			self.variable.fetched = None
 			self.dirty()
 		except dap.Error as e:
@@ -186,11 +205,6 @@ class VariableView(ui.div):
 		else:
 			await self.set_expanded()
 
-	def show_more(self) -> None:
-		count = self.state.number_expanded(self.variable)
-		self.state.set_number_expanded(self.variable, count + 20)
-		self.dirty()
-
 	def clicked_memory(self):
 		assert self.variable.memoryReference
 		self.debugger.show_memory(self.variable.session, self.variable.memoryReference)
@@ -202,12 +216,14 @@ class VariableView(ui.div):
 			else:
 				ui.spacer(3)
 
+			value_css = css.changed if self.variable.changed else None
+
 			if name:
 				ui.text(name, css=css.secondary, on_click=self.edit_variable)
 				ui.spacer(1)
-				ui.code(value, on_click=self.edit_variable)
+				ui.code(value, css=value_css, on_click=self.edit_variable)
 			else:
-				ui.code(value, on_click=self.edit_variable)
+				ui.code(value, css=value_css, on_click=self.edit_variable)
 
 			if self.variable.memoryReference:
 				ui.spacer(1)
@@ -235,8 +251,11 @@ class VariableView(ui.div):
 
 			return
 
-		count = self.state.number_expanded(self.variable)
-		for variable in self.variable_children[:count]:
+		variable_children = self.variable_children
+
+		def row(index: int):
+			variable = variable_children[index]
+
 			# this looks like a console log in js so expand it
 			if self.children_only and variable.name.startswith('arg'):
 				view = VariableView(self.debugger, variable, state=self.state, children_only=True)
@@ -244,11 +263,8 @@ class VariableView(ui.div):
 			else:
 				VariableView(self.debugger, variable, state=self.state)
 
-		more_count = len(self.variable_children) - count
-		if more_count > 0:
-			with ui.div():
-				ui.spacer(3)
-				ui.text('{} more items …'.format(more_count), css=css.secondary, on_click=self.show_more)
+		# only the children that fit in the panel are rendered
+		ui.virtual_list(len(variable_children), row, start=self.state.start(self.variable), on_scroll=lambda start: self.state.set_start(self.variable, start), control_css=css.secondary)
 
 	def render(self):
 		if self.variable_children and self.children_only:
@@ -7,7 +7,7 @@ from .. import dap
 from .. import core
 
 from ..watch import WatchExpression
-from .variable import VariableView
+from .variable import VariableView, VariableViewState
 from . import css
 from .tabbed import TabbedView
 
@@ -32,6 +32,7 @@ class VariablesView(ui.div):
 	def __init__(self, debugger: Debugger):
 		super().__init__()
 		self.debugger = debugger
+		self.state = VariableViewState(prefetch=True)
 		self.debugger.on_session_variables_updated.add(self.on_updated)
 		self.debugger.on_session_removed.add(self.on_updated)
 
@@ -52,7 +53,7 @@ class VariablesView(ui.div):
 
 		expand = True
 		for variable in session.variables:
-			view = VariableView(self.debugger, variable)
+			view = VariableView(self.debugger, variable, state=self.state)
 			if expand:
 				view.set_expanded()
 				expand = False
@@ -62,6 +63,7 @@ class WatchView(ui.div):
 	def __init__(self, debugger: Debugger) -> None:
 		super().__init__()
 		self.debugger = debugger
+		self.state = VariableViewState()
 
 	def added(self):
 		self.on_updated_handle = self.debugger.watch.on_updated.add(self.dirty)
@@ -84,14 +86,15 @@ class WatchView(ui.div):
 					ui.text('No watched expressions', css=css.secondary)
 
 			for expresion in self.debugger.watch.expressions:
-				WatchExpressionView(self.debugger, expresion)
+				WatchExpressionView(self.debugger, expresion, self.state)
 
 
 class WatchExpressionView(ui.div):
-	def __init__(self, debugger: Debugger, expression: WatchExpression):
+	def __init__(self, debugger: Debugger, expression: WatchExpression, state: VariableViewState):
 		super().__init__()
 		self.debugger = debugger
 		self.expression = expression
+		self.state = state
 
 	def added(self):
 		self.on_updated_handle = self.expression.on_updated.add(self.dirty)
@@ -101,7 +104,7 @@ class WatchExpressionView(ui.div):
 
 	def render(self):
 		if self.expression.evaluate_response:
-			VariableView(self.debugger, self.expression.evaluate_response, on_remove=lambda: self.debugger.watch.remove(self.expression))
+			VariableView(self.debugger, self.expression.evaluate_response, state=self.state, on_remove=lambda: self.debugger.watch.remove(self.expression))
 		else:
 			with ui.div():
 				ui.spacer(3)
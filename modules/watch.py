@@ -65,6 +65,10 @@ class Watch(core.Dispose):
 
 		evaluations = await core.gather_results(*results)
 		for expression, evaluation in zip(self.expressions, evaluations):
+			# cancelled because a different frame was selected, that frame has its own evaluation
+			if isinstance(evaluation, core.CancelledError):
+				continue
+
 			self.evaluated(session, expression, evaluation)
 		self.on_updated()
 
@@ -56,6 +56,7 @@ def plugin_loaded() -> None:
 	core.info('[startup]')
 
 	ui.startup(Settings.development)
+	ui.ViewRegistry.render_budget = Settings.render_budget
 
 	def open_in_windows():
 		for window in sublime.windows():
@@ -120,6 +121,7 @@ def updated_settings():
 		log_exceptions=True,
 	)
 
+	ui.ViewRegistry.render_budget = Settings.render_budget
 	ui.update_and_render()
 
 	for debugger in Debugger.debuggers():
@@ -225,6 +227,12 @@ class EventListener(sublime_plugin.EventListener):
 			debugger._refresh_none_debugger_output_panel(args['panel'])
 
 	def on_post_window_command(self, window: sublime.Window, cmd: str, args: Any):
+		# most window commands that resize views like toggling the side bar or changing the layout do not have events of their own
+		ui.ViewRegistry.update_layouts(window)
+
+		if cmd == 'show_panel' or cmd == 'hide_panel':
+			ui.ViewRegistry.visibility_changed()
+
 		if cmd == 'show_panel':
 			if panel := OutputPanel.from_output_panel_name.get(window.active_panel() or ''):
 				panel.on_show_panel()
@@ -303,6 +311,19 @@ class EventListener(sublime_plugin.EventListener):
 		for debugger in Debugger.debuggers():
 			debugger.breakpoints.source.sync_from_breakpoints(view)
 
+		# panels and widgets have no window and every layout must not be checked for them
+		if window := view.window():
+			ui.ViewRegistry.update_layouts(window)
+
+		ui.ViewRegistry.visibility_changed()
+
 	def on_modified(self, view: sublime.View) -> None:
 		for debugger in Debugger.debuggers():
 			debugger.breakpoints.source.invalidate(view)
+
+	def on_close(self, view: sublime.View) -> None:
+		for debugger in Debugger.debuggers():
+			debugger.breakpoints.source.on_close(view)
+
+		# closing a view can resize the views next to it and the view no longer has a window to narrow this down with
+		ui.ViewRegistry.update_layouts()